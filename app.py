@@ -37,6 +37,7 @@ app.add_middleware(
 # Global model storage
 MODEL = None
 MODEL_INFO = {}
+FEATURE_BIN_EDGES = None  # quantile-bin edges when the model was trained on binned features
 
 # Pydantic models for request/response validation
 class MarketFeatures(BaseModel):
@@ -98,7 +99,7 @@ STARTUP_TIME = datetime.utcnow()
 
 def load_model():
     """Load the ML model on startup or create mock model"""
-    global MODEL, MODEL_INFO
+    global MODEL, MODEL_INFO, FEATURE_BIN_EDGES
     
     try:
         model_path = os.getenv('MODEL_PATH', 'scalping_model_v2.pkl')
@@ -109,12 +110,13 @@ def load_model():
             # Load actual model
             model_data = joblib.load(model_path)
             MODEL = model_data['model']
+            FEATURE_BIN_EDGES = model_data.get('feature_bin_edges')
             
             MODEL_INFO = {
                 'version': '2.0',
                 'trained_at': model_data.get('trained_at', 'unknown'),
                 'feature_columns': model_data.get('feature_columns', []),
-                'model_type': 'RandomForestClassifier'
+                'model_type': type(MODEL).__name__
             }
             
             logger.info(f"✅ Model loaded successfully: {MODEL_INFO}")
@@ -259,6 +261,12 @@ async def predict(request: PredictionRequest):
         # Extract features in correct order
         feature_columns = MODEL_INFO['feature_columns']
         X = df[feature_columns]
+        if FEATURE_BIN_EDGES is not None:
+            # The model was trained on per-column quantile-bin indices
+            X = np.column_stack([
+                np.searchsorted(edges, X[col].to_numpy(dtype=np.float32))
+                for col, edges in zip(feature_columns, FEATURE_BIN_EDGES)
+            ]).astype(np.float32)
         
         # Make predictions
         predictions = MODEL.predict(X)
@@ -348,5 +356,10 @@ if __name__ == "__main__":
     import uvicorn
     
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Each worker loads its own copy of the model, so scale out explicitly via WEB_CONCURRENCY.
+    # uvicorn's default loop/http pick uvloop and httptools when installed; per-request access logs are off
+    uvicorn.run(
+        "app:app", host="0.0.0.0", port=port, workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level=os.getenv("LOG_LEVEL", "warning"), access_log=False
+    )
 
@@ -6,10 +6,11 @@ Run this to test ML predictions without deploying to Google Cloud Run
 import sys
 sys.path.insert(0, 'python-functions/model')
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
+from functools import lru_cache
 import uvicorn
 
 # Import our prediction module
@@ -29,6 +30,15 @@ app.add_middleware(
 # Initialize predictor
 predictor = TradingPredictor('python-functions/scalping_model_v2.pkl')
 
+@lru_cache(maxsize=1)
+def get_data_provider():
+    """Shared market data provider (keeps the Alpaca client and its HTTP session warm)"""
+    try:
+        return MarketDataProvider()
+    except ValueError as e:
+        # Not cached, so the next request retries once credentials are configured
+        raise HTTPException(500, f"Prediction failed: {str(e)}")
+
 class PredictRequest(BaseModel):
     symbols: List[str]
 
@@ -48,15 +58,12 @@ def health():
     }
 
 @app.post("/predict")
-def predict(request: PredictRequest):
+def predict(request: PredictRequest, data_provider: MarketDataProvider = Depends(get_data_provider)):
     """Get ML predictions for symbols"""
     try:
         if not request.symbols:
             raise HTTPException(400, "No symbols provided")
         
-        # Use the data provider to get features
-        data_provider = MarketDataProvider()
-        
         # Get latest market data
         bars = data_provider.get_latest_bars(request.symbols, limit=100)
         
@@ -1,13 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List
 import numpy as np
-import pandas as pd
 from datetime import datetime
 import os
+import asyncio
 
-app = FastAPI(title="Trading ML Service", version="1.0.0")
+app = FastAPI(title="Trading ML Service", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,33 +23,29 @@ class MockModel:
     def __init__(self):
         self.classes_ = np.array([-1, 0, 1])  # sell, hold, buy
     
+    def _rsi(self, X):
+        return np.asarray(X['rsi'], dtype=float)
+    
     def predict(self, X):
-        predictions = []
-        for _, row in X.iterrows():
-            rsi = row.get('rsi', 50)
-            if rsi > 70:
-                predictions.append(1)  # buy
-            elif rsi < 30:
-                predictions.append(-1)  # sell
-            else:
-                predictions.append(0)  # hold
-        return np.array(predictions)
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
     
     def predict_proba(self, X):
-        probs = []
-        for _, row in X.iterrows():
-            rsi = row.get('rsi', 50)
-            if rsi > 70:
-                probs.append([0.1, 0.1, 0.8])  # [sell, hold, buy]
-            elif rsi < 30:
-                probs.append([0.8, 0.1, 0.1])  # [sell, hold, buy]
-            else:
-                probs.append([0.2, 0.6, 0.2])  # [sell, hold, buy]
-        return np.array(probs)
+        rsi = self._rsi(X)
+        probs = np.empty((len(rsi), 3))
+        probs[:] = [0.2, 0.6, 0.2]  # [sell, hold, buy]
+        probs[rsi > 70] = [0.1, 0.1, 0.8]
+        probs[rsi < 30] = [0.8, 0.1, 0.1]
+        return probs
 
 MODEL = MockModel()
 MODEL_INFO = {"version": "mock-1.0", "model_type": "MockModel"}
 
+def _predict_core(X):
+    """Run the model on feature columns, returning (predictions, probabilities)"""
+    # predict() is just the argmax of predict_proba(), so traverse the model once
+    probabilities = MODEL.predict_proba(X)
+    return MODEL.classes_[probabilities.argmax(axis=1)], probabilities
+
 class MarketFeatures(BaseModel):
     symbol: str
     rsi: float = 50.0
@@ -66,6 +63,12 @@ class MarketFeatures(BaseModel):
     news_sentiment: float = 0.0
     price: float = 100.0
 
+FEATURE_COLUMNS = (
+    'rsi', 'macd', 'macd_histogram', 'bb_width', 'bb_position', 'ema_trend', 'volume_ratio',
+    'stochastic', 'price_change_1d', 'price_change_5d', 'price_change_10d', 'volatility_20',
+    'news_sentiment', 'price'
+)
+
 class PredictionRequest(BaseModel):
     features: List[MarketFeatures]
     include_probabilities: bool = False
@@ -91,94 +94,98 @@ async def root():
 async def predict(request: PredictionRequest):
     """Make trading predictions"""
     try:
-        # Convert features to DataFrame
-        features_data = []
-        for feat in request.features:
-            features_data.append({
-                'symbol': feat.symbol,
-                'rsi': feat.rsi,
-                'macd': feat.macd,
-                'macd_histogram': feat.macd_histogram,
-                'bb_width': feat.bb_width,
-                'bb_position': feat.bb_position,
-                'ema_trend': feat.ema_trend,
-                'volume_ratio': feat.volume_ratio,
-                'stochastic': feat.stochastic,
-                'price_change_1d': feat.price_change_1d,
-                'price_change_5d': feat.price_change_5d,
-                'price_change_10d': feat.price_change_10d,
-                'volatility_20': feat.volatility_20,
-                'news_sentiment': feat.news_sentiment,
-                'price': feat.price
-            })
+        features = request.features
+        n = len(features)
         
-        df = pd.DataFrame(features_data)
+        # One numpy column per feature (the model reads them by name, like DataFrame columns)
+        X = {name: np.array([getattr(feat, name) for feat in features], dtype=float) for name in FEATURE_COLUMNS}
         
-        # Make predictions
-        predictions = MODEL.predict(df)
-        probabilities = MODEL.predict_proba(df)
+        # Make predictions on a worker thread so the event loop stays free
+        predictions, probabilities = await asyncio.to_thread(_predict_core, X)
         
-        # Generate signals
-        signals = []
         timestamp = datetime.utcnow().isoformat()
         
-        for i, (_, row) in enumerate(df.iterrows()):
-            pred_class = int(predictions[i])
-            probs = probabilities[i]
-            
-            # Map class to action
-            class_map = {-1: 'sell', 0: 'hold', 1: 'buy'}
-            action = class_map.get(pred_class, 'hold')
-            
-            # Get confidence
-            class_idx = MODEL.classes_.tolist().index(pred_class)
-            confidence = float(probs[class_idx])
+        # Map classes to actions and pick the predicted class probability for every row at once
+        confidences = probabilities.max(axis=1)
+        actions = np.array(['sell', 'hold', 'buy'])[predictions.astype(int) + 1]
+        
+        # Indicator columns used for reasoning and the response
+        symbols = [feat.symbol for feat in features]
+        prices = X['price']
+        rsi = X['rsi']
+        macd = X['macd']
+        macd_hist = X['macd_histogram']
+        bb_pos = X['bb_position']
+        vol_ratio = X['volume_ratio']
+        stoch = X['stochastic']
+        ema_trend = X['ema_trend'].astype(int)
+        
+        # Reasoning conditions, evaluated as boolean masks over the whole batch
+        rsi_overbought = rsi > 70
+        rsi_oversold = rsi < 30
+        momentum_bull = (macd_hist > 0) & (ema_trend == 1)
+        momentum_bear = (macd_hist < 0) & (ema_trend == 0)
+        bb_upper = bb_pos > 0.9
+        bb_lower = bb_pos < 0.1
+        
+        # Response indicators for the whole batch, rounded once per column
+        indicators_list = [
+            {'rsi': r, 'macd': m, 'bb_position': b, 'volume_ratio': v, 'stochastic': st}
+            for r, m, b, v, st in zip(
+                rsi.round(2).tolist(), macd.round(4).tolist(), bb_pos.round(2).tolist(),
+                vol_ratio.round(2).tolist(), stoch.round(2).tolist()
+            )
+        ]
+        
+        confidences_list = confidences.tolist()
+        prices_list = prices.tolist()
+        
+        # Generate signals (same shape as TradingSignal)
+        signals = []
+        
+        for i in range(n):
+            action = str(actions[i])
             
             # Generate reasoning
             reasoning_parts = []
             
-            if row['rsi'] > 70:
+            if rsi_overbought[i]:
                 reasoning_parts.append("Overbought (RSI>70)")
-            elif row['rsi'] < 30:
+            elif rsi_oversold[i]:
                 reasoning_parts.append("Oversold (RSI<30)")
             
-            if row['macd_histogram'] > 0 and row['ema_trend'] == 1:
+            if momentum_bull[i]:
                 reasoning_parts.append("Bullish momentum")
-            elif row['macd_histogram'] < 0 and row['ema_trend'] == 0:
+            elif momentum_bear[i]:
                 reasoning_parts.append("Bearish momentum")
             
-            if row['bb_position'] > 0.9:
+            if bb_upper[i]:
                 reasoning_parts.append("Near upper Bollinger Band")
-            elif row['bb_position'] < 0.1:
+            elif bb_lower[i]:
                 reasoning_parts.append("Near lower Bollinger Band")
             
             reasoning = "; ".join(reasoning_parts) if reasoning_parts else f"ML {action} signal"
             
             # Build signal
-            signal = TradingSignal(
-                symbol=row['symbol'],
-                action=action,
-                confidence=confidence,
-                price=row['price'],
-                reasoning=reasoning,
-                indicators={
-                    'rsi': round(float(row['rsi']), 2),
-                    'macd': round(float(row['macd']), 4),
-                    'bb_position': round(float(row['bb_position']), 2),
-                    'volume_ratio': round(float(row['volume_ratio']), 2),
-                    'stochastic': round(float(row['stochastic']), 2)
-                },
-                timestamp=timestamp
-            )
+            signal = {
+                'symbol': symbols[i],
+                'action': action,
+                'confidence': confidences_list[i],
+                'price': prices_list[i],
+                'reasoning': reasoning,
+                'indicators': indicators_list[i],
+                'timestamp': timestamp
+            }
             
             signals.append(signal)
         
-        return {
+        # Plain dicts returned as a response skip FastAPI's jsonable_encoder walk
+        return ORJSONResponse({
             "success": True,
             "signals": signals,
             "model_version": MODEL_INFO.get('version', 'unknown'),
             "timestamp": timestamp
-        }
+        })
         
     except Exception as e:
         return {
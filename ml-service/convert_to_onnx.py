@@ -0,0 +1,45 @@
+"""
+Convert the trained Random Forest to ONNX for onnxruntime inference
+Usage: python convert_to_onnx.py [model.pkl] [model.onnx]
+"""
+
+import os
+import sys
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+
+def convert(model_path, onnx_path):
+    """Convert a joblib model artifact ({'model', 'feature_columns', ...}) to ONNX"""
+    model_data = joblib.load(model_path)
+    model = model_data['model']
+    n_features = len(model_data['feature_columns'])
+
+    # zipmap=False keeps probabilities as a plain (n, n_classes) tensor in model.classes_ order
+    onx = convert_sklearn(
+        model,
+        initial_types=[('X', FloatTensorType([None, n_features]))],
+        options={id(model): {'zipmap': False}}
+    )
+
+    with open(onnx_path, 'wb') as f:
+        f.write(onx.SerializeToString())
+
+    return onnx_path
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('MODEL_PATH', 'scalping_model_v2.pkl')
+    onnx_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + '.onnx'
+
+    print(f"🔄 Converting {model_path} to ONNX...")
+    convert(model_path, onnx_path)
+
+    size_mb = os.path.getsize(onnx_path) / (1024 * 1024)
+    print(f"✅ ONNX model saved to {onnx_path} ({size_mb:.2f} MB)")
+
+
+if __name__ == '__main__':
+    main()
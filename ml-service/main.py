@@ -3,17 +3,63 @@ FastAPI ML Inference Service for Google Cloud Run
 Provides trading signal predictions via REST API
 """
 
-from fastapi import FastAPI, HTTPException
+import os
+
+# Let the forest's own thread pool do the parallel work; keep BLAS/OpenMP single-threaded
+# so it doesn't oversubscribe the cores (must be set before numpy is imported)
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('MKL_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
-import joblib
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Optional, Tuple, Annotated
 import numpy as np
-import pandas as pd
-import os
-from datetime import datetime
+import asyncio
+import atexit
+import operator
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import logging
 
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    import treelite
+    import tl2cgen
+    TREELITE_AVAILABLE = True
+except ImportError:
+    TREELITE_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so kernels still run as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,7 +68,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Trading ML Prediction Service",
     description="Real-time trading signal predictions using Random Forest ML model",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -34,10 +81,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Uvicorn worker processes (each loads its own model) and the forest threads each one gets,
+# split so workers x RF_JOBS doesn't oversubscribe the machine
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+RF_JOBS = int(os.getenv('RF_JOBS', max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+
+# Rows per scikit-learn predict_proba call; larger batches are walked through the forest in chunks
+# so the per-tree probability buffers stay bounded and cache-resident
+PREDICT_CHUNK_ROWS = int(os.getenv('PREDICT_CHUNK_ROWS', '4096'))
+
 # Global model storage
 MODEL = None
 MODEL_INFO = {}
 
+# onnxruntime session for the converted forest (None = use scikit-learn for inference)
+ONNX_SESSION = None
+
+# Treelite-compiled native library of the forest (built by load_model when there is no ONNX export)
+# and the per-worker predictor that runs it
+TREELITE_LIB_PATH = None
+TREELITE_PREDICTOR = None
+
+# MarketFeatures attribute names in the order the model was trained on (set by load_model)
+FEATURE_COLUMNS: Tuple[str, ...] = ()
+
+# Per-feature quantile-bin edges when the model was trained on binned features (set by load_model)
+FEATURE_BIN_EDGES = None
+
+# Numeric request fields read per row: FEATURE_COLUMNS followed by any INDICATOR_COLUMNS the model
+# doesn't use, an attrgetter that pulls them all in a single C call, and where each indicator landed
+# (set by load_model)
+ROW_COLUMNS: Tuple[str, ...] = ()
+ROW_GETTER = None
+INDICATOR_INDEX: List[int] = []
+
+# Model class -> action label, and the same lookup as an array indexed by class + 1
+CLASS_MAP = {-1: 'sell', 0: 'hold', 1: 'buy'}
+ACTION_LUT = np.array(['sell', 'hold', 'buy'])
+
+# Model classes in predict_proba column order, and the action label of every column (set by load_model)
+MODEL_CLASSES = []
+CLASS_LABELS = []
+
 # Pydantic models for request/response validation
 class MarketFeatures(BaseModel):
     """Features for a single symbol"""
@@ -64,6 +149,64 @@ class PredictionRequest(BaseModel):
     include_probabilities: bool = Field(False, description="Include probability distribution")
 
 
+if MSGSPEC_AVAILABLE:
+    # msgspec mirrors of the request models above: /predict bodies are decoded straight into
+    # these structs in C, with the same field constraints, instead of through Pydantic validators
+    class MarketFeaturesStruct(msgspec.Struct, frozen=True, gc=False):
+        """Features for a single symbol (msgspec decoding)"""
+        symbol: str
+        rsi: Annotated[float, msgspec.Meta(ge=0, le=100)]
+        macd: float
+        macd_histogram: float
+        bb_width: Annotated[float, msgspec.Meta(ge=0)]
+        bb_position: Annotated[float, msgspec.Meta(ge=0, le=1)]
+        ema_trend: Annotated[int, msgspec.Meta(ge=0, le=1)]
+        volume_ratio: Annotated[float, msgspec.Meta(ge=0)]
+        stochastic: Annotated[float, msgspec.Meta(ge=0, le=100)]
+        price_change_1d: float
+        price_change_5d: float
+        price_change_10d: float
+        volatility_20: Annotated[float, msgspec.Meta(ge=0)]
+        news_sentiment: Annotated[float, msgspec.Meta(ge=-1, le=1)] = 0.0
+        price: Optional[float] = None
+
+    class PredictionRequestStruct(msgspec.Struct, frozen=True, gc=False):
+        """Request for batch predictions (msgspec decoding)"""
+        features: List[MarketFeaturesStruct]
+        include_probabilities: bool = False
+
+    # strict=False allows the same lax coercions as Pydantic (e.g. "50" -> 50.0, 1.0 -> 1)
+    PREDICTION_REQUEST_DECODER = msgspec.json.Decoder(PredictionRequestStruct, strict=False)
+
+
+async def parse_prediction_request(request: Request):
+    """Decode a /predict body with msgspec when available, otherwise with Pydantic"""
+    body = await request.body()
+    
+    if MSGSPEC_AVAILABLE:
+        try:
+            return PREDICTION_REQUEST_DECODER.decode(body)
+        except msgspec.DecodeError:
+            pass  # Invalid bodies are re-validated by Pydantic below for FastAPI-shaped error details
+    
+    try:
+        return PredictionRequest.model_validate_json(body)
+    except ValidationError as e:
+        # Same 422 body as FastAPI's own validation: detail is a list of {loc, msg, type, ...}
+        raise RequestValidationError(
+            [{**error, 'loc': ('body', *error['loc'])} for error in e.errors(include_url=False)],
+            body=body
+        )
+
+
+def _prediction_request_schema():
+    """PredictionRequest JSON schema with nested models inlined, for the /predict OpenAPI docs"""
+    schema = PredictionRequest.model_json_schema()
+    defs = schema.pop('$defs', {})
+    schema['properties']['features']['items'] = defs['MarketFeatures']
+    return schema
+
+
 class TradingSignal(BaseModel):
     """Trading signal response"""
     symbol: str
@@ -93,12 +236,289 @@ class HealthResponse(BaseModel):
 
 
 # Startup time for health checks
-STARTUP_TIME = datetime.utcnow()
+STARTUP_TIME = datetime.now(timezone.utc)
+
+
+# Request fields used for reasoning and response indicators
+INDICATOR_COLUMNS = ('rsi', 'macd', 'macd_histogram', 'bb_position', 'volume_ratio', 'stochastic', 'ema_trend')
+
+# Reasoning templates indexed by the codes produced by _classify_tags (code 0 = no reasoning)
+REASONING_TEMPLATES = (
+    (None, "Overbought conditions (RSI {})", "Oversold conditions (RSI {})", "Neutral RSI ({})"),
+    (None, "Bullish momentum (MACD {}, EMA trend up)", "Bearish momentum (MACD {}, EMA trend down)",
+     "Positive MACD ({})", "Negative MACD ({})"),
+    (None, "Near upper Bollinger Band ({:.1f}%)", "Near lower Bollinger Band ({:.1f}%)",
+     "Mid-range Bollinger position ({:.1f}%)"),
+    (None, "High volume ({}x average)", "Low volume ({}x average)", "Normal volume ({}x average)"),
+    (None, "Overbought stochastic ({})", "Oversold stochastic ({})"),
+)
+
+
+@njit(cache=True)
+def _classify_tags(rsi, macd_hist, ema_trend, bb_pos, vol_ratio, stoch):
+    """
+    Classify every row into small integer reasoning codes
+    
+    Returns an (n, 5) array with one code per RSI, momentum, Bollinger,
+    volume and stochastic regime, indexing into REASONING_TEMPLATES
+    """
+    n = rsi.shape[0]
+    codes = np.zeros((n, 5), dtype=np.int8)
+    
+    for i in range(n):
+        # RSI analysis
+        if rsi[i] > 70:
+            codes[i, 0] = 1
+        elif rsi[i] < 30:
+            codes[i, 0] = 2
+        elif rsi[i] >= 30 and rsi[i] <= 70:
+            codes[i, 0] = 3
+        
+        # MACD and EMA momentum
+        if macd_hist[i] > 0 and ema_trend[i] == 1:
+            codes[i, 1] = 1
+        elif macd_hist[i] < 0 and ema_trend[i] == 0:
+            codes[i, 1] = 2
+        elif macd_hist[i] > 0:
+            codes[i, 1] = 3
+        elif macd_hist[i] < 0:
+            codes[i, 1] = 4
+        
+        # Bollinger Bands
+        if bb_pos[i] > 0.9:
+            codes[i, 2] = 1
+        elif bb_pos[i] < 0.1:
+            codes[i, 2] = 2
+        elif bb_pos[i] >= 0.4 and bb_pos[i] <= 0.6:
+            codes[i, 2] = 3
+        
+        # Volume analysis
+        if vol_ratio[i] > 2:
+            codes[i, 3] = 1
+        elif vol_ratio[i] < 0.5:
+            codes[i, 3] = 2
+        elif vol_ratio[i] >= 0.8 and vol_ratio[i] <= 1.2:
+            codes[i, 3] = 3
+        
+        # Stochastic oscillator
+        if stoch[i] > 80:
+            codes[i, 4] = 1
+        elif stoch[i] < 20:
+            codes[i, 4] = 2
+    
+    return codes
+
+
+def _predict_core(X: np.ndarray):
+    """Run the model on a feature matrix, returning (predictions, probabilities)"""
+    # Trees split on float32 thresholds; a C-contiguous float32 matrix avoids an internal copy
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if ONNX_SESSION is not None:
+        predictions, probabilities = ONNX_SESSION.run(None, {'X': X})
+        return predictions, probabilities
+    if TREELITE_PREDICTOR is not None and len(X):
+        probabilities = TREELITE_PREDICTOR.predict(tl2cgen.DMatrix(X)).reshape(len(X), -1)
+        return MODEL.classes_[probabilities.argmax(axis=1)], probabilities
+    # RandomForest predict() is the argmax of predict_proba(), so traverse the trees once
+    if len(X) <= PREDICT_CHUNK_ROWS:
+        probabilities = MODEL.predict_proba(X)
+    else:
+        probabilities = np.empty((len(X), len(MODEL.classes_)))
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            probabilities[start:start + PREDICT_CHUNK_ROWS] = MODEL.predict_proba(X[start:start + PREDICT_CHUNK_ROWS])
+    return MODEL.classes_[probabilities.argmax(axis=1)], probabilities
+
+
+class PredictionBatcher:
+    """
+    Coalesce concurrent /predict calls into a single model call
+    
+    Requests queue their feature matrix and wait on a future; a background task
+    collects everything that arrives within timeout_ms (up to max_rows), runs the
+    model once on the stacked batch and hands each caller back its own slice.
+    """
+    
+    def __init__(self, predict_fn, max_rows: int = 512, timeout_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_rows = max_rows
+        self.timeout = timeout_ms / 1000
+        self.queue = None
+        self.worker = None
+    
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+    
+    async def submit(self, X: np.ndarray):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            pending = [await self.queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.timeout
+            
+            # Keep collecting requests until the window closes or the batch is full
+            while rows < self.max_rows:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            
+            X = pending[0][0] if len(pending) == 1 else np.concatenate([x for x, _ in pending])
+            
+            try:
+                # Run the forest on a worker thread so the event loop keeps accepting requests
+                predictions, probabilities = await asyncio.to_thread(self.predict_fn, X)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            # Hand each caller back the rows it submitted
+            start = 0
+            for x, future in pending:
+                end = start + len(x)
+                if not future.done():
+                    future.set_result((predictions[start:end], probabilities[start:end]))
+                start = end
+
+
+BATCHER = PredictionBatcher(
+    _predict_core,
+    max_rows=int(os.getenv('BATCH_MAX_ROWS', '512')),
+    timeout_ms=float(os.getenv('BATCH_TIMEOUT_MS', '5'))
+)
+
+# LRU of recent model outputs keyed on the exact float32 feature row, so symbols re-polled with
+# unchanged indicators skip the forest entirely (0 disables; cleared by load_model)
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTION_CACHE = OrderedDict()
+
+
+async def _predict_cached(X: np.ndarray):
+    """Predict a batch, only sending rows missing from PREDICTION_CACHE through the batcher"""
+    if PREDICTION_CACHE_SIZE <= 0:
+        return await BATCHER.submit(X)
+    
+    keys = [row.tobytes() for row in X]
+    hits = [PREDICTION_CACHE.get(key) for key in keys]
+    misses = [i for i, hit in enumerate(hits) if hit is None]
+    
+    if misses:
+        predictions, probabilities = await BATCHER.submit(X[misses])
+        for j, i in enumerate(misses):
+            hits[i] = (predictions[j], probabilities[j].copy())
+    
+    # (Re)insert every row as most recent; concurrent requests may have evicted hits meanwhile
+    for key, hit in zip(keys, hits):
+        PREDICTION_CACHE[key] = hit
+        PREDICTION_CACHE.move_to_end(key)
+    while len(PREDICTION_CACHE) > PREDICTION_CACHE_SIZE:
+        PREDICTION_CACHE.popitem(last=False)
+    
+    return np.array([hit[0] for hit in hits]), np.array([hit[1] for hit in hits])
+
+
+def _onnx_model_path() -> str:
+    """ONNX export of the model (see convert_to_onnx.py)"""
+    model_path = os.getenv('MODEL_PATH', 'scalping_model_v2.pkl')
+    return os.getenv('ONNX_MODEL_PATH', os.path.splitext(model_path)[0] + '.onnx')
+
+
+def _compile_treelite_lib(model):
+    """
+    Compile the forest to a native shared library with treelite, returning its path. Opt-in
+    (TREELITE_COMPILE=1): a large forest takes minutes and GBs of memory to build
+    """
+    if not TREELITE_AVAILABLE or os.getenv('TREELITE_COMPILE', '0') != '1':
+        return None
+    
+    build_dir = tempfile.mkdtemp(prefix='treelite-')
+    owner_pid = os.getpid()
+    
+    def _remove_build_dir():
+        # Only the compiling process cleans up; forked workers exiting must not pull the library from the rest
+        if os.getpid() == owner_pid:
+            shutil.rmtree(build_dir, ignore_errors=True)
+    
+    atexit.register(_remove_build_dir)
+    
+    try:
+        libpath = os.path.join(build_dir, 'forest.so')
+        tl2cgen.export_lib(
+            treelite.sklearn.import_model(model),
+            toolchain='gcc',
+            libpath=libpath,
+            params={'parallel_comp': os.cpu_count() or 1}
+        )
+        logger.info(f"✅ Forest compiled with treelite to {libpath}")
+        return libpath
+    except Exception as e:
+        logger.warning(f"⚠️  Could not compile the forest with treelite, using scikit-learn inference: {e}")
+        return None
+
+
+def _load_treelite_predictor(libpath: str):
+    """Open a treelite predictor for the compiled forest, if one was built"""
+    if libpath is None:
+        return None
+    
+    try:
+        return tl2cgen.Predictor(libpath, nthread=RF_JOBS)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not load treelite library {libpath}, using scikit-learn inference: {e}")
+        return None
+
+
+def _warm_up():
+    """Run one synthetic row through the model and the reasoning kernel so the first real request
+    doesn't pay for lazy initialisation (thread pools, JIT compilation, cold tree pages)"""
+    start = time.perf_counter()
+    _predict_core(np.zeros((1, len(FEATURE_COLUMNS)), dtype=np.float32))
+    zeros = np.zeros(1)
+    _classify_tags(zeros, zeros, np.zeros(1, dtype=int), zeros, zeros, zeros)
+    return time.perf_counter() - start
+
+
+def _inference_backend() -> str:
+    """Name of the engine this worker runs predictions on"""
+    if ONNX_SESSION is not None:
+        return 'onnxruntime'
+    if TREELITE_PREDICTOR is not None:
+        return 'treelite'
+    return 'sklearn'
+
+
+def _load_onnx_session(onnx_path: str):
+    """Open an onnxruntime session for the converted forest, if one is available"""
+    if not ONNXRUNTIME_AVAILABLE or not os.path.exists(onnx_path):
+        return None
+    
+    try:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = RF_JOBS
+        session = ort.InferenceSession(onnx_path, sess_options=options, providers=['CPUExecutionProvider'])
+        logger.info(f"✅ ONNX Runtime session loaded from {onnx_path}")
+        return session
+    except Exception as e:
+        logger.warning(f"⚠️  Could not load ONNX model from {onnx_path}, using scikit-learn inference: {e}")
+        return None
 
 
 def load_model():
     """Load the ML model on startup - NO MOCK MODEL FALLBACK"""
-    global MODEL, MODEL_INFO
+    global MODEL, MODEL_INFO, FEATURE_COLUMNS, FEATURE_BIN_EDGES, ROW_COLUMNS, ROW_GETTER, INDICATOR_INDEX, MODEL_CLASSES, CLASS_LABELS, TREELITE_LIB_PATH
     
     try:
         model_path = os.getenv('MODEL_PATH', 'scalping_model_v2.pkl')
@@ -110,16 +530,34 @@ def load_model():
             logger.error("❌ This service requires a real trained model - no mock model fallback")
             return False
         
-        # Load actual model
+        # Load actual model (joblib is only needed here, so keep it off the import path)
+        import joblib
         model_data = joblib.load(model_path)
         MODEL = model_data['model']
         
+        # Traverse trees in parallel across cores during predict
+        if hasattr(MODEL, 'n_jobs'):
+            MODEL.n_jobs = RF_JOBS
+        
+        # Without an ONNX export, compile the forest to native code once here (before any fork)
+        if not os.path.exists(_onnx_model_path()):
+            TREELITE_LIB_PATH = _compile_treelite_lib(MODEL)
+        
         MODEL_INFO = {
             'version': '2.0',
             'trained_at': model_data.get('trained_at', 'unknown'),
             'feature_columns': model_data.get('feature_columns', []),
-            'model_type': 'RandomForestClassifier'
+            'model_type': type(MODEL).__name__
         }
+        FEATURE_COLUMNS = tuple(MODEL_INFO['feature_columns'])
+        FEATURE_BIN_EDGES = model_data.get('feature_bin_edges')
+        ROW_COLUMNS = FEATURE_COLUMNS + tuple(c for c in INDICATOR_COLUMNS if c not in FEATURE_COLUMNS)
+        ROW_GETTER = operator.attrgetter(*ROW_COLUMNS)
+        INDICATOR_INDEX = [ROW_COLUMNS.index(c) for c in INDICATOR_COLUMNS]
+        
+        MODEL_CLASSES = MODEL.classes_.tolist() if hasattr(MODEL, 'classes_') else []
+        CLASS_LABELS = [CLASS_MAP.get(c, str(c)) for c in MODEL_CLASSES]
+        PREDICTION_CACHE.clear()
         
         logger.info(f"✅ Real model loaded successfully: {MODEL_INFO}")
         logger.info(f"✅ Model has {len(MODEL_INFO['feature_columns'])} features")
@@ -131,11 +569,36 @@ def load_model():
         return False
 
 
+# Load the model at import time so `gunicorn --preload` unpickles it once in the master process
+# and forked workers share its read-only pages copy-on-write instead of each holding a copy
+load_model()
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Load model on startup"""
+    """Start per-worker inference state (batcher, onnxruntime session / treelite predictor)"""
+    global ONNX_SESSION, TREELITE_PREDICTOR
+    
     logger.info("🚀 Starting ML Inference Service...")
-    if load_model():
+    
+    # asyncio.to_thread runs inference on the loop's default executor; size it to the cores
+    # instead of Python's default (cpu_count + 4) so CPU-bound calls don't oversubscribe
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='inference')
+    )
+    BATCHER.start()
+    if MODEL is not None:
+        # Native thread pools don't survive fork, so each worker opens its own session/predictor.
+        # Prefer the ONNX export of the same forest when present (see convert_to_onnx.py)
+        ONNX_SESSION = await asyncio.to_thread(_load_onnx_session, _onnx_model_path())
+        if ONNX_SESSION is None:
+            TREELITE_PREDICTOR = await asyncio.to_thread(_load_treelite_predictor, TREELITE_LIB_PATH)
+        logger.info(f"✅ Inference backend: {_inference_backend()}")
+        try:
+            elapsed = await asyncio.to_thread(_warm_up)
+            logger.info(f"🔥 Model warmed up in {elapsed * 1000:.0f} ms")
+        except Exception as e:
+            logger.warning(f"⚠️  Model warm-up failed: {e}")
         logger.info("✅ Service ready with REAL model!")
     else:
         logger.error("❌ Service failed to start - REAL model required!")
@@ -160,7 +623,7 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    uptime = (datetime.utcnow() - STARTUP_TIME).total_seconds()
+    uptime = (datetime.now(timezone.utc) - STARTUP_TIME).total_seconds()
     
     return HealthResponse(
         status="healthy" if MODEL is not None else "unhealthy",
@@ -178,14 +641,28 @@ async def get_model_info():
     
     return {
         "success": True,
-        "model_info": MODEL_INFO,
-        "feature_count": len(MODEL_INFO.get('feature_columns', [])),
-        "classes": MODEL.classes_.tolist() if hasattr(MODEL, 'classes_') else []
+        "model_info": {
+            **MODEL_INFO,
+            'inference_backend': _inference_backend()
+        },
+        "feature_count": len(FEATURE_COLUMNS),
+        "classes": MODEL_CLASSES
     }
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+# Signals are built as plain dicts and encoded by orjson; PredictionResponse only documents the schema
+@app.post(
+    "/predict",
+    response_model=None,
+    responses={200: {"model": PredictionResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _prediction_request_schema()}}
+        }
+    }
+)
+async def predict(request: PredictionRequest = Depends(parse_prediction_request)):
     """
     Make trading signal predictions
     
@@ -195,107 +672,82 @@ async def predict(request: PredictionRequest):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Convert features to DataFrame
-        features_data = []
-        for feat in request.features:
-            features_data.append({
-                'symbol': feat.symbol,
-                'rsi': feat.rsi,
-                'macd': feat.macd,
-                'macd_histogram': feat.macd_histogram,
-                'bb_width': feat.bb_width,
-                'bb_position': feat.bb_position,
-                'ema_trend': feat.ema_trend,
-                'volume_ratio': feat.volume_ratio,
-                'stochastic': feat.stochastic,
-                'price_change_1d': feat.price_change_1d,
-                'price_change_5d': feat.price_change_5d,
-                'price_change_10d': feat.price_change_10d,
-                'volatility_20': feat.volatility_20,
-                'news_sentiment': feat.news_sentiment,
-                'price': feat.price
-            })
+        features = request.features
+        n = len(features)
         
-        df = pd.DataFrame(features_data)
+        # Read every numeric field of the request in a single pass; the model inputs are the leading
+        # columns in trained order, cast to float32
+        rows = np.array([ROW_GETTER(feat) for feat in features], dtype=float).reshape(n, len(ROW_COLUMNS))
+        X = rows[:, :len(FEATURE_COLUMNS)].astype(np.float32)
+        if FEATURE_BIN_EDGES is not None:
+            # The model was trained on per-column quantile-bin indices
+            X = np.column_stack([
+                np.searchsorted(edges, X[:, j]) for j, edges in enumerate(FEATURE_BIN_EDGES)
+            ]).astype(np.float32)
         
-        # Extract features in correct order
-        feature_columns = MODEL_INFO['feature_columns']
-        X = df[feature_columns]
+        # Make predictions (cached rows skipped, the rest batched with any concurrent requests)
+        if n > 0:
+            predictions, probabilities = await _predict_cached(X)
+        else:
+            # Nothing to score; sklearn and treelite reject 0-sample inputs, so don't call the model
+            predictions = np.empty(0, dtype=np.int64)
+            probabilities = np.empty((0, len(MODEL_CLASSES)), dtype=np.float32)
         
-        # Make predictions
-        predictions = MODEL.predict(X)
-        probabilities = MODEL.predict_proba(X)
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
         
-        # Generate signals
-        signals = []
-        timestamp = datetime.utcnow().isoformat()
+        # Map classes to actions and pick the predicted class probability for every row at once
+        # (predictions are the argmax of probabilities, so the confidence is just the row max)
+        confidences = probabilities.max(axis=1)
+        actions = ACTION_LUT[predictions.astype(int) + 1]
+        
+        # Slice the indicator fields out of the same pass as rounded column arrays
+        symbols = [feat.symbol for feat in features]
+        prices = [feat.price for feat in features]
+        indicators = rows[:, INDICATOR_INDEX]
+        rsi = indicators[:, 0].round(2)
+        macd = indicators[:, 1].round(4)
+        macd_hist = indicators[:, 2].round(4)
+        bb_pos = indicators[:, 3].round(3)
+        bb_pos_ind = indicators[:, 3].round(2)
+        vol_ratio = indicators[:, 4].round(2)
+        stoch = indicators[:, 5].round(2)
+        ema_trend = indicators[:, 6].astype(int)
+        
+        # Reasoning regimes for the whole batch, formatted per row from REASONING_TEMPLATES
+        reasoning_codes = _classify_tags(rsi, macd_hist, ema_trend, bb_pos, vol_ratio, stoch).tolist()
+        reasoning_values = tuple(col.tolist() for col in (rsi, macd, bb_pos * 100, vol_ratio, stoch))
         
         # Log prediction distribution for debugging
-        action_counts = {'buy': 0, 'sell': 0, 'hold': 0}
+        action_counts = {
+            'buy': int(np.count_nonzero(actions == 'buy')),
+            'sell': int(np.count_nonzero(actions == 'sell')),
+            'hold': int(np.count_nonzero(actions == 'hold'))
+        }
         
-        for i, (_, row) in enumerate(df.iterrows()):
-            pred_class = int(predictions[i])
-            probs = probabilities[i]
-            
-            # Map class to action
-            class_map = {-1: 'sell', 0: 'hold', 1: 'buy'}
-            action = class_map.get(pred_class, 'hold')
-            action_counts[action] = action_counts.get(action, 0) + 1
-            
-            # Get confidence
-            class_idx = MODEL.classes_.tolist().index(pred_class)
-            confidence = float(probs[class_idx])
+        # Native Python values for the response dicts
+        actions_list = actions.tolist()
+        confidences_list = confidences.tolist()
+        rsi_list, macd_list, _, vol_ratio_list, stoch_list = reasoning_values
+        indicators_list = [
+            {'rsi': r, 'macd': m, 'bb_position': b, 'volume_ratio': v, 'stochastic': st}
+            for r, m, b, v, st in zip(rsi_list, macd_list, bb_pos_ind.tolist(), vol_ratio_list, stoch_list)
+        ]
+        
+        # Probability distributions rounded for the whole batch in one call, only when requested
+        probabilities_list = np.round(probabilities, 4).tolist() if request.include_probabilities else None
+        
+        # Generate signals
+        signals = []
+        
+        for i in range(n):
+            action = actions_list[i]
+            confidence = confidences_list[i]
             
             # Generate reasoning with specific indicator values
-            reasoning_parts = []
-            
-            rsi_val = round(float(row['rsi']), 2)
-            macd_val = round(float(row['macd']), 4)
-            macd_hist = round(float(row.get('macd_histogram', 0)), 4)
-            bb_pos = round(float(row['bb_position']), 3)
-            vol_ratio = round(float(row['volume_ratio']), 2)
-            stoch_val = round(float(row.get('stochastic', 50)), 2)
-            ema_trend = int(row.get('ema_trend', 0))
-            
-            # RSI analysis
-            if rsi_val > 70:
-                reasoning_parts.append(f"Overbought conditions (RSI {rsi_val})")
-            elif rsi_val < 30:
-                reasoning_parts.append(f"Oversold conditions (RSI {rsi_val})")
-            elif 30 <= rsi_val <= 70:
-                reasoning_parts.append(f"Neutral RSI ({rsi_val})")
-            
-            # MACD and EMA momentum
-            if macd_hist > 0 and ema_trend == 1:
-                reasoning_parts.append(f"Bullish momentum (MACD {macd_val}, EMA trend up)")
-            elif macd_hist < 0 and ema_trend == 0:
-                reasoning_parts.append(f"Bearish momentum (MACD {macd_val}, EMA trend down)")
-            elif macd_hist > 0:
-                reasoning_parts.append(f"Positive MACD ({macd_val})")
-            elif macd_hist < 0:
-                reasoning_parts.append(f"Negative MACD ({macd_val})")
-            
-            # Bollinger Bands
-            if bb_pos > 0.9:
-                reasoning_parts.append(f"Near upper Bollinger Band ({bb_pos*100:.1f}%)")
-            elif bb_pos < 0.1:
-                reasoning_parts.append(f"Near lower Bollinger Band ({bb_pos*100:.1f}%)")
-            elif 0.4 <= bb_pos <= 0.6:
-                reasoning_parts.append(f"Mid-range Bollinger position ({bb_pos*100:.1f}%)")
-            
-            # Volume analysis
-            if vol_ratio > 2:
-                reasoning_parts.append(f"High volume ({vol_ratio}x average)")
-            elif vol_ratio < 0.5:
-                reasoning_parts.append(f"Low volume ({vol_ratio}x average)")
-            elif 0.8 <= vol_ratio <= 1.2:
-                reasoning_parts.append(f"Normal volume ({vol_ratio}x average)")
-            
-            # Stochastic oscillator
-            if stoch_val > 80:
-                reasoning_parts.append(f"Overbought stochastic ({stoch_val})")
-            elif stoch_val < 20:
-                reasoning_parts.append(f"Oversold stochastic ({stoch_val})")
+            reasoning_parts = [
+                REASONING_TEMPLATES[k][code].format(reasoning_values[k][i])
+                for k, code in enumerate(reasoning_codes[i]) if code
+            ]
             
             # Combine reasoning parts
             if reasoning_parts:
@@ -304,46 +756,38 @@ async def predict(request: PredictionRequest):
                 # Fallback with basic signal info
                 reasoning = f"ML {action} signal (confidence: {confidence*100:.1f}%)"
             
-            # Build signal
-            signal = TradingSignal(
-                symbol=row['symbol'],
-                action=action,
-                confidence=confidence,
-                price=row['price'] if pd.notna(row['price']) else None,
-                reasoning=reasoning,
-                indicators={
-                    'rsi': round(float(row['rsi']), 2),
-                    'macd': round(float(row['macd']), 4),
-                    'bb_position': round(float(row['bb_position']), 2),
-                    'volume_ratio': round(float(row['volume_ratio']), 2),
-                    'stochastic': round(float(row['stochastic']), 2)
-                },
-                timestamp=timestamp
-            )
+            # Build signal (same shape as TradingSignal; probabilities only when requested)
+            signal = {
+                'symbol': symbols[i],
+                'action': action,
+                'confidence': confidence,
+                'price': prices[i],
+                'reasoning': reasoning,
+                'indicators': indicators_list[i],
+                'timestamp': timestamp
+            }
             
             # Add probabilities if requested
-            if request.include_probabilities:
-                prob_dict = {}
-                for cls, prob in zip(MODEL.classes_, probs):
-                    prob_dict[class_map.get(cls, str(cls))] = round(float(prob), 4)
-                signal.probabilities = prob_dict
+            if probabilities_list is not None:
+                signal['probabilities'] = dict(zip(CLASS_LABELS, probabilities_list[i]))
             
             signals.append(signal)
         
         # Log prediction summary
         logger.info(f"📊 ML Predictions Summary: {len(signals)} total signals")
         logger.info(f"   - BUY: {action_counts.get('buy', 0)} | SELL: {action_counts.get('sell', 0)} | HOLD: {action_counts.get('hold', 0)}")
-        if action_counts.get('hold', 0) == len(signals):
+        if signals and action_counts.get('hold', 0) == len(signals):
             logger.warning(f"⚠️  All {len(signals)} symbols predicted as HOLD - model is being very conservative")
         elif action_counts.get('hold', 0) > len(signals) * 0.8:
             logger.info(f"💡 {action_counts.get('hold', 0)}/{len(signals)} symbols predicted as HOLD ({(action_counts.get('hold', 0)/len(signals)*100):.1f}%) - this is normal for conservative models")
         
-        return PredictionResponse(
-            success=True,
-            signals=signals,
-            model_version=MODEL_INFO.get('version', 'unknown'),
-            timestamp=timestamp
-        )
+        # Returning the response directly skips FastAPI's jsonable_encoder walk over every signal
+        return ORJSONResponse({
+            'success': True,
+            'signals': signals,
+            'model_version': MODEL_INFO.get('version', 'unknown'),
+            'timestamp': timestamp
+        })
         
     except Exception as e:
         logger.error(f"Prediction error: {e}")
@@ -355,5 +799,5 @@ if __name__ == "__main__":
     import uvicorn
     
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=WEB_CONCURRENCY)
 
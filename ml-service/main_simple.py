@@ -11,12 +11,15 @@ logger = logging.getLogger(__name__)
 app = FastAPI(title="ML Trading Service", version="1.0.0")
 
 # Simple mock model for testing
+# The mock used to re-seed NumPy with 42 and draw one random number on every call, so its
+# output was always this constant (np.random.seed(42); np.random.random() == 0.3745401188473625)
+_MOCK_PROBA = np.array([[0.3745401188473625, 0.6254598811526375]])
+_MOCK_PROBA.flags.writeable = False
+
 class MockModel:
     def predict_proba(self, features):
-        # Simple mock prediction - returns random probabilities
-        np.random.seed(42)  # For consistent results
-        prob = np.random.random()
-        return np.array([[prob, 1-prob]])
+        # Simple mock prediction - fixed probabilities
+        return _MOCK_PROBA
 
 model = MockModel()
 
@@ -1,24 +1,71 @@
 """
 Test script for ML inference service
 Can test locally or against deployed Cloud Run service
+
+Usage: python test_service.py [base_url] [concurrent_predictions]
+Endpoints are hit concurrently; pass concurrent_predictions > 0 to also fan out that many
+simultaneous /predict calls as a small load test.
 """
 
-import requests
+import asyncio
+import httpx
 import json
 import sys
+import time
+
+# Sample features
+PAYLOAD = {
+    "features": [
+        {
+            "symbol": "AAPL",
+            "rsi": 55.5,
+            "macd": 0.05,
+            "macd_histogram": 0.02,
+            "bb_width": 0.03,
+            "bb_position": 0.6,
+            "ema_trend": 1,
+            "volume_ratio": 1.2,
+            "stochastic": 60.0,
+            "price_change_1d": 0.01,
+            "price_change_5d": 0.05,
+            "price_change_10d": 0.08,
+            "volatility_20": 0.02,
+            "news_sentiment": 0.1,
+            "price": 175.50
+        },
+        {
+            "symbol": "TSLA",
+            "rsi": 75.0,
+            "macd": -0.02,
+            "macd_histogram": -0.05,
+            "bb_width": 0.05,
+            "bb_position": 0.85,
+            "ema_trend": 0,
+            "volume_ratio": 2.5,
+            "stochastic": 80.0,
+            "price_change_1d": -0.02,
+            "price_change_5d": 0.10,
+            "price_change_10d": 0.15,
+            "volatility_20": 0.04,
+            "news_sentiment": -0.2,
+            "price": 250.75
+        }
+    ],
+    "include_probabilities": True
+}
 
-def test_health(base_url):
+async def test_health(client):
     """Test health endpoint"""
+    response = await client.get("/health")
     print(f"\n🏥 Testing health endpoint...")
-    response = requests.get(f"{base_url}/health")
     print(f"  Status: {response.status_code}")
     print(f"  Response: {json.dumps(response.json(), indent=2)}")
     return response.status_code == 200
 
-def test_model_info(base_url):
+async def test_model_info(client):
     """Test model info endpoint"""
+    response = await client.get("/model-info")
     print(f"\n📊 Testing model info endpoint...")
-    response = requests.get(f"{base_url}/model-info")
     print(f"  Status: {response.status_code}")
     if response.status_code == 200:
         print(f"  Response: {json.dumps(response.json(), indent=2)}")
@@ -26,57 +73,10 @@ def test_model_info(base_url):
         print(f"  Error: {response.text}")
     return response.status_code == 200
 
-def test_prediction(base_url):
+async def test_prediction(client):
     """Test prediction endpoint"""
+    response = await client.post("/predict", json=PAYLOAD)
     print(f"\n🔮 Testing prediction endpoint...")
-    
-    # Sample features
-    payload = {
-        "features": [
-            {
-                "symbol": "AAPL",
-                "rsi": 55.5,
-                "macd": 0.05,
-                "macd_histogram": 0.02,
-                "bb_width": 0.03,
-                "bb_position": 0.6,
-                "ema_trend": 1,
-                "volume_ratio": 1.2,
-                "stochastic": 60.0,
-                "price_change_1d": 0.01,
-                "price_change_5d": 0.05,
-                "price_change_10d": 0.08,
-                "volatility_20": 0.02,
-                "news_sentiment": 0.1,
-                "price": 175.50
-            },
-            {
-                "symbol": "TSLA",
-                "rsi": 75.0,
-                "macd": -0.02,
-                "macd_histogram": -0.05,
-                "bb_width": 0.05,
-                "bb_position": 0.85,
-                "ema_trend": 0,
-                "volume_ratio": 2.5,
-                "stochastic": 80.0,
-                "price_change_1d": -0.02,
-                "price_change_5d": 0.10,
-                "price_change_10d": 0.15,
-                "volatility_20": 0.04,
-                "news_sentiment": -0.2,
-                "price": 250.75
-            }
-        ],
-        "include_probabilities": True
-    }
-    
-    response = requests.post(
-        f"{base_url}/predict",
-        json=payload,
-        headers={"Content-Type": "application/json"}
-    )
-    
     print(f"  Status: {response.status_code}")
     
     if response.status_code == 200:
@@ -101,6 +101,58 @@ def test_prediction(base_url):
     
     return response.status_code == 200
 
+async def test_invalid_prediction(client):
+    """Invalid input returns FastAPI's 422 shape: detail is a list of {loc, msg, type} errors"""
+    invalid = {"features": [{**PAYLOAD["features"][0], "rsi": 150.0}, {"symbol": "TSLA"}]}
+    response = await client.post("/predict", json=invalid)
+    print(f"\n🚫 Testing invalid prediction input...")
+    print(f"  Status: {response.status_code}")
+    
+    detail = response.json().get('detail') if response.status_code == 422 else None
+    valid_shape = (
+        isinstance(detail, list) and len(detail) > 0
+        and all({'loc', 'msg', 'type'} <= error.keys() and error['loc'][0] == 'body' for error in detail)
+    )
+    if valid_shape:
+        print(f"  Errors: {[(error['loc'], error['type']) for error in detail]}")
+    else:
+        print(f"  ❌ Unexpected error body: {response.text}")
+    return valid_shape
+
+async def test_concurrent_predictions(client, count):
+    """Fire `count` /predict calls at once to exercise the service under concurrent load"""
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *(client.post("/predict", json=PAYLOAD) for _ in range(count)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    
+    ok = sum(1 for r in responses if not isinstance(r, Exception) and r.status_code == 200)
+    print(f"\n⚡ Testing {count} concurrent predictions...")
+    print(f"  Succeeded: {ok}/{count}")
+    print(f"  Total time: {elapsed:.2f}s ({count / elapsed:.1f} req/s)")
+    return ok == count
+
+async def run_all(base_url, concurrency):
+    """Run the endpoint tests concurrently against base_url"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        health, model_info, prediction, invalid_prediction = await asyncio.gather(
+            test_health(client),
+            test_model_info(client),
+            test_prediction(client),
+            test_invalid_prediction(client)
+        )
+        results = {
+            'health': health, 'model_info': model_info, 'prediction': prediction,
+            'invalid_prediction': invalid_prediction
+        }
+        
+        if concurrency > 0:
+            results['concurrent_predictions'] = await test_concurrent_predictions(client, concurrency)
+    
+    return results
+
 def main():
     """Run all tests"""
     # Get base URL from command line or use local
@@ -108,6 +160,7 @@ def main():
         base_url = sys.argv[1].rstrip('/')
     else:
         base_url = "http://localhost:8080"
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 0
     
     print("=" * 70)
     print("🧪 ML INFERENCE SERVICE TEST")
@@ -115,10 +168,7 @@ def main():
     print(f"Testing: {base_url}")
     
     # Run tests
-    results = {}
-    results['health'] = test_health(base_url)
-    results['model_info'] = test_model_info(base_url)
-    results['prediction'] = test_prediction(base_url)
+    results = asyncio.run(run_all(base_url, concurrency))
     
     # Summary
     print("\n" + "=" * 70)
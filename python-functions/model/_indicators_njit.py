@@ -0,0 +1,110 @@
+"""
+Compiled indicator kernels for predict_with_real_data.py
+Kernels take float64 price arrays and evaluate only the latest bar, matching the
+last value of the equivalent pandas rolling/ewm calls (NaN where undefined)
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so kernels still run as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _mean_std_last(x, n):
+    """
+    Mean and sample standard deviation (ddof=1) of the last n values; a window of equal values
+    has a standard deviation of exactly 0 (like fast_indicators.rolling_std), not rounding noise
+    """
+    size = x.shape[0]
+    total = 0.0
+    flat = True
+    for i in range(size - n, size):
+        total += x[i]
+        if x[i] != x[size - 1]:
+            flat = False
+    mean = total / n
+    if flat:
+        return mean, 0.0
+    sq = 0.0
+    for i in range(size - n, size):
+        sq += (x[i] - mean) * (x[i] - mean)
+    return mean, np.sqrt(sq / (n - 1))
+
+
+@njit(cache=True)
+def _macd_last(x, fast, slow, signal):
+    """
+    Last MACD value and histogram in one pass over x, keeping the fast, slow and signal EMA
+    states in registers instead of materializing the MACD series
+    """
+    alpha_fast = 2.0 / (fast + 1.0)
+    alpha_slow = 2.0 / (slow + 1.0)
+    alpha_signal = 2.0 / (signal + 1.0)
+    ema_fast = x[0]
+    ema_slow = x[0]
+    ema_signal = 0.0  # MACD of the first bar is always 0
+    m = 0.0
+    for i in range(1, x.shape[0]):
+        ema_fast += alpha_fast * (x[i] - ema_fast)
+        ema_slow += alpha_slow * (x[i] - ema_slow)
+        m = ema_fast - ema_slow
+        ema_signal += alpha_signal * (m - ema_signal)
+    return m, m - ema_signal
+
+
+@njit(cache=True)
+def _ewm_last(x, span):
+    """Last value of ewm(span=span, adjust=False).mean() without materializing the series"""
+    alpha = 2.0 / (span + 1.0)
+    y = x[0]
+    for i in range(1, x.shape[0]):
+        y = alpha * x[i] + (1.0 - alpha) * y
+    return y
+
+
+@njit(cache=True, error_model='numpy')
+def _rsi_last(close, n):
+    """
+    RSI of the last bar with Wilder's smoothing, ewm(alpha=1/n, adjust=False) of gains and losses
+    over the whole history (100 when there are no losses, NaN when prices never moved)
+    """
+    alpha = 1.0 / n
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, close.shape[0]):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i == 1:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain += alpha * (gain - avg_gain)
+            avg_loss += alpha * (loss - avg_loss)
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+@njit(cache=True)
+def _stoch_last(high, low, close, n):
+    """Stochastic %K of the last bar over a window of n"""
+    size = close.shape[0]
+    lowest = low[size - 1]
+    highest = high[size - 1]
+    for i in range(size - n, size - 1):
+        if low[i] < lowest:
+            lowest = low[i]
+        if high[i] > highest:
+            highest = high[i]
+    if highest > lowest:
+        return 100.0 * (close[size - 1] - lowest) / (highest - lowest)
+    return np.nan
@@ -0,0 +1,278 @@
+"""
+Compiled rolling-window kernels for train_with_real_data.py
+O(n) running formulations of the pandas rolling mean/std/min/max used by
+TechnicalIndicators. Inputs are float64 arrays; outputs are aligned with the input
+and NaN until the window is full or while it contains a NaN (pandas min_periods=window)
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so kernels still run as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def rolling_mean(a, w):
+    """Rolling mean over a window of w using a running sum"""
+    n = a.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nans = 0
+    for i in range(n):
+        x = a[i]
+        if np.isnan(x):
+            nans += 1
+        else:
+            total += x
+        if i >= w:
+            old = a[i - w]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                total -= old
+        if i >= w - 1 and nans == 0:
+            out[i] = total / w
+    return out
+
+
+@njit(cache=True)
+def rolling_std(a, w):
+    """Rolling sample standard deviation (ddof=1) using Welford add/remove updates"""
+    n = a.shape[0]
+    out = np.full(n, np.nan)
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    nans = 0
+    run = 0  # length of the run of equal values ending at i; constant windows are exactly 0
+    for i in range(n):
+        x = a[i]
+        if np.isnan(x):
+            nans += 1
+            run = 0
+        else:
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+            run = run + 1 if i > 0 and x == a[i - 1] else 1
+        if i >= w:
+            old = a[i - w]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                count -= 1
+                if count == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = old - mean
+                    mean -= delta / count
+                    m2 -= delta * (old - mean)
+        if i >= w - 1 and nans == 0:
+            if run >= w or m2 <= 0.0:
+                out[i] = 0.0
+            else:
+                out[i] = np.sqrt(m2 / (w - 1))
+    return out
+
+
+@njit(cache=True)
+def rolling_min(a, w):
+    """Rolling minimum over a window of w using a monotonic deque of indices"""
+    n = a.shape[0]
+    out = np.full(n, np.nan)
+    dq = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    nans = 0
+    for i in range(n):
+        x = a[i]
+        if np.isnan(x):
+            nans += 1
+        else:
+            while tail > head and a[dq[tail - 1]] >= x:
+                tail -= 1
+            dq[tail] = i
+            tail += 1
+        if i >= w and np.isnan(a[i - w]):
+            nans -= 1
+        while tail > head and dq[head] <= i - w:
+            head += 1
+        if i >= w - 1 and nans == 0:
+            out[i] = a[dq[head]]
+    return out
+
+
+@njit(cache=True)
+def rolling_max(a, w):
+    """Rolling maximum over a window of w using a monotonic deque of indices"""
+    n = a.shape[0]
+    out = np.full(n, np.nan)
+    dq = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    nans = 0
+    for i in range(n):
+        x = a[i]
+        if np.isnan(x):
+            nans += 1
+        else:
+            while tail > head and a[dq[tail - 1]] <= x:
+                tail -= 1
+            dq[tail] = i
+            tail += 1
+        if i >= w and np.isnan(a[i - w]):
+            nans -= 1
+        while tail > head and dq[head] <= i - w:
+            head += 1
+        if i >= w - 1 and nans == 0:
+            out[i] = a[dq[head]]
+    return out
+
+
+@njit(cache=True)
+def ema(a, span):
+    """Exponential moving average, equivalent to ewm(span=span, adjust=False).mean()"""
+    alpha = 2.0 / (span + 1.0)
+    n = a.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    y = a[0]
+    out[0] = y
+    for i in range(1, n):
+        y = alpha * a[i] + (1.0 - alpha) * y
+        out[i] = y
+    return out
+
+
+@njit(cache=True, error_model='numpy')
+def wilder_rsi(close, period):
+    """
+    RSI with Wilder's smoothing: gains and losses averaged like ewm(alpha=1/period, adjust=False)
+    from the first change, NaN until period changes have been seen (100 when there are no losses)
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 1.0 / period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i == 1:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain += alpha * (gain - avg_gain)
+            avg_loss += alpha * (loss - avg_loss)
+        if i >= period:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit(cache=True)
+def macd(a, fast, slow, signal):
+    """
+    MACD line, signal line and histogram in one pass, keeping the fast, slow and signal EMA
+    states in registers (same values as three ewm(span, adjust=False) passes)
+    """
+    n = a.shape[0]
+    macd_line = np.empty(n)
+    signal_line = np.empty(n)
+    histogram = np.empty(n)
+    if n == 0:
+        return macd_line, signal_line, histogram
+    alpha_fast = 2.0 / (fast + 1.0)
+    alpha_slow = 2.0 / (slow + 1.0)
+    alpha_signal = 2.0 / (signal + 1.0)
+    ema_fast = a[0]
+    ema_slow = a[0]
+    ema_signal = 0.0
+    for i in range(n):
+        ema_fast += alpha_fast * (a[i] - ema_fast)
+        ema_slow += alpha_slow * (a[i] - ema_slow)
+        m = ema_fast - ema_slow
+        ema_signal = m if i == 0 else ema_signal + alpha_signal * (m - ema_signal)
+        macd_line[i] = m
+        signal_line[i] = ema_signal
+        histogram[i] = m - ema_signal
+    return macd_line, signal_line, histogram
+
+
+# Row order of the matrix filled by compute_all_indicators (and the column order of the training frame)
+INDICATOR_COLUMNS = (
+    'rsi', 'macd', 'macd_signal', 'macd_histogram',
+    'bb_middle', 'bb_upper', 'bb_lower', 'bb_width', 'bb_position',
+    'ema_20', 'ema_50', 'ema_trend', 'volume_ratio', 'stochastic',
+    'price_change_1d', 'price_change_5d', 'price_change_10d', 'volatility_20'
+)
+
+
+@njit(cache=True, error_model='numpy')
+def compute_all_indicators(close, high, low, volume, out):
+    """
+    Fill out[k, i] with every training indicator for one symbol's time-ordered bars
+    (k follows INDICATOR_COLUMNS). Divisions follow IEEE semantics like the pandas version
+    """
+    n = close.shape[0]
+    returns = np.full(n, np.nan)
+    for i in range(1, n):
+        returns[i] = close[i] / close[i - 1] - 1.0
+
+    rsi = wilder_rsi(close, 14)
+    macd_line, signal, histogram = macd(close, 12, 26, 9)
+    bb_middle = rolling_mean(close, 20)
+    bb_std = rolling_std(close, 20)
+    ema_20 = ema(close, 20)
+    ema_50 = ema(close, 50)
+    avg_volume = rolling_mean(volume, 20)
+    lowest_low = rolling_min(low, 14)
+    highest_high = rolling_max(high, 14)
+    volatility = rolling_std(returns, 20)
+
+    for i in range(n):
+        bb_upper = bb_middle[i] + 2.0 * bb_std[i]
+        bb_lower = bb_middle[i] - 2.0 * bb_std[i]
+
+        out[0, i] = rsi[i]
+        out[1, i] = macd_line[i]
+        out[2, i] = signal[i]
+        out[3, i] = histogram[i]
+        out[4, i] = bb_middle[i]
+        out[5, i] = bb_upper
+        out[6, i] = bb_lower
+        out[7, i] = (bb_upper - bb_lower) / bb_middle[i]
+        out[8, i] = (close[i] - bb_lower) / (bb_upper - bb_lower)
+        out[9, i] = ema_20[i]
+        out[10, i] = ema_50[i]
+        out[11, i] = 1.0 if ema_20[i] > ema_50[i] else 0.0
+        out[12, i] = volume[i] / avg_volume[i]
+        out[13, i] = 100.0 * (close[i] - lowest_low[i]) / (highest_high[i] - lowest_low[i])
+        out[14, i] = returns[i]
+        out[15, i] = close[i] / close[i - 5] - 1.0 if i >= 5 else np.nan
+        out[16, i] = close[i] / close[i - 10] - 1.0 if i >= 10 else np.nan
+        out[17, i] = volatility[i]
+
+
+@njit(cache=True, parallel=True)
+def fill_all_indicators(close, high, low, volume, starts, ends, out):
+    """Run compute_all_indicators for every symbol slice [starts[s], ends[s]) in parallel"""
+    for s in prange(starts.shape[0]):
+        start = starts[s]
+        end = ends[s]
+        compute_all_indicators(
+            close[start:end], high[start:end], low[start:end], volume[start:end], out[:, start:end]
+        )
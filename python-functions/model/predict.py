@@ -1,7 +1,10 @@
+import io
 import os
 import json
+import threading
+import time
 from http.server import BaseHTTPRequestHandler
-from datetime import datetime
+from datetime import datetime, timezone
 
 import numpy as np
 import pandas as pd
@@ -9,14 +12,72 @@ from joblib import load
 from dotenv import load_dotenv
 from supabase import create_client
 
+# Load environment variables once at import rather than on every request
+load_dotenv()
+
+MODEL_OBJECT = 'scalping_model.pkl'
+
+# Seconds between checks of the stored model's metadata; a warm process picks up a newly uploaded
+# model within this window instead of serving the one it first downloaded forever
+MODEL_CHECK_INTERVAL = float(os.getenv('MODEL_CHECK_INTERVAL', '60'))
+
+# Model is downloaded once per process and reused by every request until the stored object changes
+_MODEL = None
+_MODEL_VERSION = None  # updated_at (or etag) of the stored object the model was loaded from
+_MODEL_CHECKED = 0.0  # time.monotonic() of the last metadata check
+_MODEL_LOCK = threading.Lock()
+
+# Supabase client is created once per process; it holds the auth headers and HTTP session
+_SB_CLIENT = None
+
 
 def _json(status: int, body: dict):
     return status, {'Content-Type': 'application/json'}, json.dumps(body).encode()
 
 
+def _supabase(url: str, key: str):
+    global _SB_CLIENT
+    if _SB_CLIENT is None:
+        _SB_CLIENT = create_client(url, key)
+    return _SB_CLIENT
+
+
+def _model_version(storage):
+    """updated_at (or etag) of the stored model object, None if it isn't listed"""
+    for item in storage.list('', {'search': MODEL_OBJECT}) or []:
+        if item.get('name') == MODEL_OBJECT:
+            return item.get('updated_at') or (item.get('metadata') or {}).get('eTag')
+    return None
+
+
+def _get_model(url: str, key: str):
+    """Return the process-wide model, re-downloading it when the stored object has been replaced"""
+    global _MODEL, _MODEL_VERSION, _MODEL_CHECKED
+    
+    model = _MODEL
+    if model is not None and time.monotonic() - _MODEL_CHECKED < MODEL_CHECK_INTERVAL:
+        return model
+    
+    with _MODEL_LOCK:
+        if _MODEL is not None and time.monotonic() - _MODEL_CHECKED < MODEL_CHECK_INTERVAL:
+            return _MODEL
+        
+        storage = _supabase(url, key).storage.from_('models')
+        try:
+            version = _model_version(storage)
+        except Exception:
+            version = None  # Metadata unavailable: keep serving the loaded model
+        
+        if _MODEL is None or (version is not None and version != _MODEL_VERSION):
+            _MODEL = load(io.BytesIO(storage.download(MODEL_OBJECT)))
+            _MODEL_VERSION = version
+        _MODEL_CHECKED = time.monotonic()
+    
+    return _MODEL
+
+
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
-        load_dotenv()
         try:
             length = int(self.headers.get('content-length', '0'))
             raw = self.rfile.read(length) if length > 0 else b'{}'
@@ -39,16 +100,8 @@ class handler(BaseHTTPRequestHandler):
             self._send(status, headers, body)
             return
 
-        client = create_client(url, key)
-        bucket = 'models'
-        path = 'scalping_model.pkl'
         try:
-            resp = client.storage.from_(bucket).download(path)
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.pkl') as tmp:
-                tmp.write(resp)
-                tmp.flush()
-                model = load(tmp.name)
+            model = _get_model(url, key)
         except Exception:
             # If model not available yet, return no signals
             status, headers, body = _json(200, {
@@ -60,7 +113,7 @@ class handler(BaseHTTPRequestHandler):
             return
 
         # For now, construct placeholder features for given symbols (will be replaced with live data)
-        now = datetime.utcnow().isoformat()
+        now = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
         rows = []
         for s in symbols:
             rows.append({
@@ -74,33 +127,32 @@ class handler(BaseHTTPRequestHandler):
                 'price': 150.0,
             })
         df = pd.DataFrame(rows)
-        X = df[['rsi','macd','bbWidth','volumeRatio','newsSentiment','emaTrend']]
+        # Trees compare float32 features, so hand them float32 rather than letting sklearn cast a float64 copy
+        # (a plain array: train_standalone fits on an unnamed matrix in this column order)
+        X = df[['rsi','macd','bbWidth','volumeRatio','newsSentiment','emaTrend']].to_numpy(dtype=np.float32)
         preds = model.predict_proba(X) if hasattr(model, 'predict_proba') else None
-        pred_cls = model.predict(X)
+        # predict() is the argmax of predict_proba(), so reuse the probabilities when we have them
+        pred_cls = model.classes_[preds.argmax(axis=1)] if preds is not None else model.predict(X)
+
+        # Map every class to its action at once: 0 -> hold, 1 -> buy, anything else -> sell
+        pred_cls = np.asarray(pred_cls).astype(int)
+        actions = np.where(pred_cls == 0, 'hold', np.where(pred_cls == 1, 'buy', 'sell')).tolist()
+
+        if preds is not None and preds.shape[1] >= 3:
+            # Map class -> index: assume classes sorted [-1,0,1] or [0,1,2]; use best effort
+            # Take max prob as confidence
+            confs = preds.max(axis=1).tolist()
+        else:
+            confs = [0.6] * len(symbols)
+        prices = df['price'].tolist()
 
         signals = []
         for i, s in enumerate(symbols):
-            cls = int(pred_cls[i])
-            if cls == 0:
-                action = 'hold'
-            elif cls == 1:
-                action = 'buy'
-            else:
-                action = 'sell'
-
-            conf = None
-            if preds is not None and preds.shape[1] >= 3:
-                # Map class -> index: assume classes sorted [-1,0,1] or [0,1,2]; use best effort
-                # Take max prob as confidence
-                conf = float(np.max(preds[i]))
-            else:
-                conf = 0.6
-
             signals.append({
                 'symbol': s,
-                'action': action,
-                'confidence': conf,
-                'price': float(df.loc[i, 'price']),
+                'action': actions[i],
+                'confidence': confs[i],
+                'price': float(prices[i]),
                 'timestamp': now,
                 'reasoning': 'RF prediction'
             })
@@ -3,32 +3,68 @@ Enhanced Prediction Script for Real-Time Trading Signals
 Uses the trained model with real market data
 """
 
+import io
 import os
 import sys
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
-import pandas as pd
 import numpy as np
 import joblib
+from requests.adapters import HTTPAdapter
+import alpaca_trade_api as tradeapi
 from dotenv import load_dotenv
 
+from _indicators_njit import _ewm_last, _macd_last, _mean_std_last, _rsi_last, _stoch_last
+
 # Load environment variables
 load_dotenv()
 
-try:
-    import alpaca_trade_api as tradeapi
-except ImportError:
-    print("Installing alpaca-trade-api...")
-    os.system("pip install alpaca-trade-api")
-    import alpaca_trade_api as tradeapi
 
-try:
-    from supabase import create_client
-except ImportError:
-    print("Installing supabase...")
-    os.system("pip install supabase")
-    from supabase import create_client
+MODEL_PATH = 'scalping_model_v2.pkl'
+
+# Parallel requests used when the multi-symbol bars endpoint is unavailable
+FETCH_WORKERS = 16
+
+# Predictor is loaded once per process and reused by every call
+_PREDICTOR = None
+_PREDICTOR_MTIME = None
+_PREDICTOR_LOCK = threading.Lock()
+
+# Supabase client is created once per process; it holds the auth headers and HTTP session
+_SB_CLIENT = None
+
+
+def _supabase(url, key):
+    global _SB_CLIENT
+    if _SB_CLIENT is None:
+        # Imported lazily: only needed when the local model file is missing
+        from supabase import create_client
+        
+        _SB_CLIENT = create_client(url, key)
+    return _SB_CLIENT
+
+
+PRICE_COLUMNS = ('close', 'high', 'low', 'volume')
+
+# Fallbacks for indicators that are undefined on the latest bar (e.g. flat prices)
+FEATURE_DEFAULTS = {
+    'rsi': 50.0,
+    'macd': 0.0,
+    'macd_histogram': 0.0,
+    'bb_width': 0.02,
+    'bb_position': 0.5,
+    'ema_trend': 0,
+    'volume_ratio': 1.0,
+    'stochastic': 50.0,
+    'price_change_1d': 0.0,
+    'price_change_5d': 0.0,
+    'price_change_10d': 0.0,
+    'volatility_20': 0.0,
+}
+FEATURE_DEFAULT_VALUES = np.array(list(FEATURE_DEFAULTS.values()), dtype=np.float64)
 
 
 class MarketDataProvider:
@@ -47,108 +83,158 @@ class MarketDataProvider:
             base_url='https://paper-api.alpaca.markets',
             api_version='v2'
         )
+        
+        # Size the connection pool for the concurrent per-symbol fallback
+        session = getattr(self.api, '_session', None)
+        if session is not None:
+            adapter = HTTPAdapter(pool_connections=FETCH_WORKERS, pool_maxsize=FETCH_WORKERS)
+            session.mount('https://', adapter)
     
     def get_latest_bars(self, symbols, limit=100):
-        """Get latest bars for technical indicator calculation"""
+        """Get latest bars for technical indicator calculation (one multi-symbol request)"""
         all_bars = {}
+        symbols = list(symbols)
+        
+        if not symbols:
+            return all_bars
+        
+        # A multi-symbol request's limit is one budget shared by every symbol (bars come back grouped
+        # by symbol), so request a calendar window covering `limit` trading days and page through it
+        start = datetime.utcnow() - timedelta(days=limit * 7 // 5 + 10)
+        try:
+            bars = self.api.get_bars(
+                symbols,
+                '1Day',
+                start=start.strftime('%Y-%m-%d'),
+                limit=None
+            ).df
+        except Exception as e:
+            print(f"Multi-symbol fetch failed ({e}), fetching {len(symbols)} symbols concurrently")
+            return self._get_latest_bars_concurrent(symbols, limit)
         
+        if bars.empty:
+            print(f"No bars returned by the multi-symbol request, fetching {len(symbols)} symbols concurrently")
+            return self._get_latest_bars_concurrent(symbols, limit)
+        
+        # Newer SDKs return a (symbol, timestamp) MultiIndex, older ones a symbol column
+        bars = bars.reset_index()
+        bars.columns = bars.columns.str.lower()
+        if 'symbol' not in bars.columns:
+            bars['symbol'] = symbols[0]
+        
+        # Sort once so every per-symbol slice is ascending in time for the indicator kernels
+        bars = bars.sort_values('timestamp', kind='stable')
+        
+        groups = dict(tuple(bars.groupby('symbol', sort=False)))
         for symbol in symbols:
-            try:
-                bars = self.api.get_bars(
-                    symbol,
-                    '1Day',
-                    limit=limit
-                ).df
+            if symbol in groups:
+                all_bars[symbol] = groups[symbol].drop(columns='symbol').tail(limit).reset_index(drop=True)
+        
+        # Retry symbols the batch left out one by one rather than silently dropping their predictions
+        missing = [symbol for symbol in symbols if symbol not in all_bars]
+        if missing:
+            print(f"Batch fetch returned no bars for {len(missing)} symbols, retrying them individually")
+            all_bars.update(self._get_latest_bars_concurrent(missing, limit))
+            all_bars = {symbol: all_bars[symbol] for symbol in symbols if symbol in all_bars}
+        
+        return all_bars
+    
+    def _get_latest_bars_concurrent(self, symbols, limit):
+        """Fallback: one request per symbol, issued in parallel (the calls are network-bound)"""
+        fetched = {}
+        
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(symbols))) as executor:
+            futures = {
+                executor.submit(self.api.get_bars, symbol, '1Day', limit=limit): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    bars = future.result().df
+                except Exception as e:
+                    print(f"Error fetching {symbol}: {e}")
+                    continue
+                
+                if bars.empty:
+                    continue
                 
-                if not bars.empty:
-                    bars = bars.reset_index()
-                    bars.columns = [col.lower() for col in bars.columns]
-                    all_bars[symbol] = bars
-                    
-            except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
+                bars = bars.reset_index()
+                bars.columns = bars.columns.str.lower()
+                bars = bars.sort_values('timestamp', kind='stable')
+                fetched[symbol] = bars.drop(columns='symbol', errors='ignore').tail(limit).reset_index(drop=True)
         
+        # Keep the caller's symbol order regardless of completion order
+        all_bars = {symbol: fetched[symbol] for symbol in symbols if symbol in fetched}
+        self._report_missing(symbols, all_bars)
         return all_bars
     
+    @staticmethod
+    def _report_missing(symbols, all_bars):
+        missing = [s for s in symbols if s not in all_bars]
+        if missing:
+            print(f"No bars returned for {', '.join(missing)}")
+    
     def calculate_features(self, bars_dict):
-        """Calculate technical indicators for each symbol"""
+        """Calculate the latest technical indicators for each symbol with the compiled kernels"""
         features_list = []
         
         for symbol, bars in bars_dict.items():
             if len(bars) < 50:  # Need enough data for indicators
                 continue
             
-            # Calculate indicators (same as training)
-            close = bars['close']
-            high = bars['high']
-            low = bars['low']
-            volume = bars['volume']
+            # Calculate indicators (same as training) on contiguous float64 arrays
+            close, high, low, volume = (
+                np.ascontiguousarray(bars[col].to_numpy(dtype=np.float64)) for col in PRICE_COLUMNS
+            )
             
             # RSI
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
+            rsi = _rsi_last(close, 14)
             
-            # MACD
-            ema_12 = close.ewm(span=12, adjust=False).mean()
-            ema_26 = close.ewm(span=26, adjust=False).mean()
-            macd = ema_12 - ema_26
-            signal = macd.ewm(span=9, adjust=False).mean()
-            macd_histogram = macd - signal
+            # MACD (the signal line needs the full MACD history, folded into the same pass)
+            macd, macd_histogram = _macd_last(close, 12, 26, 9)
             
             # Bollinger Bands
-            bb_middle = close.rolling(window=20).mean()
-            bb_std = close.rolling(window=20).std()
+            bb_middle, bb_std = _mean_std_last(close, 20)
             bb_upper = bb_middle + (2 * bb_std)
             bb_lower = bb_middle - (2 * bb_std)
-            bb_width = (bb_upper - bb_lower) / bb_middle
-            bb_position = (close - bb_lower) / (bb_upper - bb_lower)
+            bb_width = (bb_upper - bb_lower) / bb_middle if bb_middle != 0 else np.nan
+            bb_position = (close[-1] - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else np.nan
             
             # EMAs
-            ema_20 = close.ewm(span=20, adjust=False).mean()
-            ema_50 = close.ewm(span=50, adjust=False).mean()
-            ema_trend = (ema_20 > ema_50).astype(int)
+            ema_trend = int(_ewm_last(close, 20) > _ewm_last(close, 50))
             
             # Volume ratio
-            avg_volume = volume.rolling(window=20).mean()
-            volume_ratio = volume / avg_volume
+            avg_volume = _mean_std_last(volume, 20)[0]
+            volume_ratio = volume[-1] / avg_volume if avg_volume > 0 else np.nan
             
             # Stochastic
-            lowest_low = low.rolling(window=14).min()
-            highest_high = high.rolling(window=14).max()
-            stochastic = 100 * (close - lowest_low) / (highest_high - lowest_low)
+            stochastic = _stoch_last(high, low, close, 14)
             
-            # Price changes
-            price_change_1d = close.pct_change(1)
-            price_change_5d = close.pct_change(5)
-            price_change_10d = close.pct_change(10)
+            # Price changes (daily returns are shared with the volatility window)
+            returns = close[-20:] / close[-21:-1] - 1
+            price_change_1d = returns[-1]
+            price_change_5d = close[-1] / close[-6] - 1
+            price_change_10d = close[-1] / close[-11] - 1
             
             # Volatility
-            volatility_20 = close.pct_change().rolling(20).std()
+            volatility_20 = _mean_std_last(returns, 20)[1]
             
-            # Get latest values
-            latest_idx = len(bars) - 1
+            # Same order as FEATURE_DEFAULTS; undefined values fall back in one vectorized pass
+            latest = np.array([
+                rsi, macd, macd_histogram, bb_width, bb_position, ema_trend, volume_ratio,
+                stochastic, price_change_1d, price_change_5d, price_change_10d, volatility_20
+            ])
+            latest = np.where(np.isnan(latest), FEATURE_DEFAULT_VALUES, latest)
             
             features = {
                 'symbol': symbol,
-                'timestamp': bars.iloc[latest_idx]['timestamp'],
-                'price': float(close.iloc[latest_idx]),
-                'rsi': float(rsi.iloc[latest_idx]) if not pd.isna(rsi.iloc[latest_idx]) else 50.0,
-                'macd': float(macd.iloc[latest_idx]) if not pd.isna(macd.iloc[latest_idx]) else 0.0,
-                'macd_histogram': float(macd_histogram.iloc[latest_idx]) if not pd.isna(macd_histogram.iloc[latest_idx]) else 0.0,
-                'bb_width': float(bb_width.iloc[latest_idx]) if not pd.isna(bb_width.iloc[latest_idx]) else 0.02,
-                'bb_position': float(bb_position.iloc[latest_idx]) if not pd.isna(bb_position.iloc[latest_idx]) else 0.5,
-                'ema_trend': int(ema_trend.iloc[latest_idx]),
-                'volume_ratio': float(volume_ratio.iloc[latest_idx]) if not pd.isna(volume_ratio.iloc[latest_idx]) else 1.0,
-                'stochastic': float(stochastic.iloc[latest_idx]) if not pd.isna(stochastic.iloc[latest_idx]) else 50.0,
-                'price_change_1d': float(price_change_1d.iloc[latest_idx]) if not pd.isna(price_change_1d.iloc[latest_idx]) else 0.0,
-                'price_change_5d': float(price_change_5d.iloc[latest_idx]) if not pd.isna(price_change_5d.iloc[latest_idx]) else 0.0,
-                'price_change_10d': float(price_change_10d.iloc[latest_idx]) if not pd.isna(price_change_10d.iloc[latest_idx]) else 0.0,
-                'volatility_20': float(volatility_20.iloc[latest_idx]) if not pd.isna(volatility_20.iloc[latest_idx]) else 0.0,
-                'news_sentiment': 0.0  # Placeholder for now
+                'timestamp': bars['timestamp'].iloc[-1],
+                'price': float(close[-1]),
             }
+            features.update(zip(FEATURE_DEFAULTS, latest.tolist()))
+            features['ema_trend'] = ema_trend
+            features['news_sentiment'] = 0.0  # Placeholder for now
             
             features_list.append(features)
         
@@ -162,6 +248,7 @@ class TradingPredictor:
         self.model_data = None
         self.model = None
         self.feature_columns = None
+        self.feature_bin_edges = None
         
         if model_path:
             self.load_model(model_path)
@@ -172,6 +259,7 @@ class TradingPredictor:
             self.model_data = joblib.load(path)
             self.model = self.model_data['model']
             self.feature_columns = self.model_data['feature_columns']
+            self.feature_bin_edges = self.model_data.get('feature_bin_edges')
             print(f"✅ Model loaded from {path}")
             return True
         except Exception as e:
@@ -187,23 +275,19 @@ class TradingPredictor:
             raise ValueError("Supabase credentials not found")
         
         try:
-            client = create_client(url, key)
+            client = _supabase(url, key)
             bucket = 'models'
             path = 'scalping_model_v2.pkl'
             
             print(f"Downloading model from Supabase...")
             model_bytes = client.storage.from_(bucket).download(path)
             
-            # Save temporarily and load
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as tmp:
-                tmp.write(model_bytes)
-                tmp_path = tmp.name
-            
-            self.load_model(tmp_path)
-            
-            # Clean up
-            os.unlink(tmp_path)
+            # Deserialize straight from memory instead of round-tripping through a temp file
+            self.model_data = joblib.load(io.BytesIO(model_bytes))
+            self.model = self.model_data['model']
+            self.feature_columns = self.model_data['feature_columns']
+            self.feature_bin_edges = self.model_data.get('feature_bin_edges')
+            print(f"✅ Model loaded from Supabase ({bucket}/{path})")
             
             return True
             
@@ -216,87 +300,133 @@ class TradingPredictor:
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        # Convert to DataFrame
-        df = pd.DataFrame(features_list)
+        def column(name):
+            return np.fromiter((f[name] for f in features_list), dtype=np.float64, count=len(features_list))
         
-        # Extract features in correct order
-        X = df[self.feature_columns]
+        # Extract features in correct order straight from the dicts; trees compare float32,
+        # so skip sklearn's float64 -> float32 copy
+        X = np.array(
+            [[f[col] for col in self.feature_columns] for f in features_list],
+            dtype=np.float32
+        )
+        
+        # Models trained on quantized features expect the same per-column bin indices
+        if self.feature_bin_edges is not None:
+            X = np.column_stack([
+                np.searchsorted(edges, X[:, j]) for j, edges in enumerate(self.feature_bin_edges)
+            ]).astype(np.float32)
         
-        # Make predictions
-        predictions = self.model.predict(X)
+        # Make predictions: predict() is the argmax of predict_proba(), so walk the forest once
         probabilities = self.model.predict_proba(X)
+        class_index = probabilities.argmax(axis=1)
+        predictions = self.model.classes_[class_index]
         
-        # Create signals
-        signals = []
+        # Confidence is the probability of the predicted class
+        confidences = probabilities[np.arange(len(predictions)), class_index]
         
-        for i, row in df.iterrows():
-            pred_class = int(predictions[i])
-            probs = probabilities[i]
-            
-            # Map class to action
-            if pred_class == 1:
-                action = 'buy'
-                confidence = float(probs[self.model.classes_.tolist().index(1)])
-            elif pred_class == -1:
-                action = 'sell'
-                confidence = float(probs[self.model.classes_.tolist().index(-1)])
-            else:
-                action = 'hold'
-                confidence = float(probs[self.model.classes_.tolist().index(0)])
-            
-            # Generate reasoning
-            reasoning_parts = []
-            if row['rsi'] > 70:
-                reasoning_parts.append("Overbought (RSI>70)")
-            elif row['rsi'] < 30:
-                reasoning_parts.append("Oversold (RSI<30)")
-            
-            if row['macd_histogram'] > 0 and row['ema_trend'] == 1:
-                reasoning_parts.append("Bullish momentum")
-            elif row['macd_histogram'] < 0 and row['ema_trend'] == 0:
-                reasoning_parts.append("Bearish momentum")
-            
-            if row['bb_position'] > 0.9:
-                reasoning_parts.append("Near upper BB")
-            elif row['bb_position'] < 0.1:
-                reasoning_parts.append("Near lower BB")
-            
-            reasoning = "; ".join(reasoning_parts) if reasoning_parts else "ML prediction"
-            
-            signal = {
-                'symbol': row['symbol'],
+        # Map class to action
+        actions = np.where(predictions == 1, 'buy', np.where(predictions == -1, 'sell', 'hold'))
+        
+        # Generate reasoning
+        rsi = column('rsi')
+        macd_histogram = column('macd_histogram')
+        ema_trend = column('ema_trend')
+        bb_position = column('bb_position')
+        
+        rsi_notes = np.where(rsi > 70, "Overbought (RSI>70)", np.where(rsi < 30, "Oversold (RSI<30)", ""))
+        momentum_notes = np.where(
+            (macd_histogram > 0) & (ema_trend == 1), "Bullish momentum",
+            np.where((macd_histogram < 0) & (ema_trend == 0), "Bearish momentum", "")
+        )
+        bb_notes = np.where(bb_position > 0.9, "Near upper BB", np.where(bb_position < 0.1, "Near lower BB", ""))
+        reasoning = [
+            "; ".join(part for part in parts if part) or "ML prediction"
+            for parts in zip(rsi_notes.tolist(), momentum_notes.tolist(), bb_notes.tolist())
+        ]
+        
+        timestamps = [
+            f['timestamp'] if isinstance(f['timestamp'], str) else f['timestamp'].isoformat()
+            for f in features_list
+        ]
+        
+        indicators = [
+            {
+                'rsi': rsi_value,
+                'macd': macd_value,
+                'bb_position': bb_value,
+                'volume_ratio': volume_value,
+                'stochastic': stochastic_value
+            }
+            for rsi_value, macd_value, bb_value, volume_value, stochastic_value in zip(
+                np.round(rsi, 2).tolist(),
+                np.round(column('macd'), 4).tolist(),
+                np.round(bb_position, 2).tolist(),
+                np.round(column('volume_ratio'), 2).tolist(),
+                np.round(column('stochastic'), 2).tolist()
+            )
+        ]
+        
+        # Create signals
+        signals = [
+            {
+                'symbol': symbol,
                 'action': action,
                 'confidence': confidence,
-                'price': row['price'],
-                'timestamp': row['timestamp'] if isinstance(row['timestamp'], str) else row['timestamp'].isoformat(),
-                'reasoning': reasoning,
-                'indicators': {
-                    'rsi': round(row['rsi'], 2),
-                    'macd': round(row['macd'], 4),
-                    'bb_position': round(row['bb_position'], 2),
-                    'volume_ratio': round(row['volume_ratio'], 2),
-                    'stochastic': round(row['stochastic'], 2)
-                }
+                'price': price,
+                'timestamp': timestamp,
+                'reasoning': reason,
+                'indicators': indicator_values
             }
-            
-            signals.append(signal)
+            for symbol, action, confidence, price, timestamp, reason, indicator_values in zip(
+                [f['symbol'] for f in features_list],
+                actions.tolist(),
+                confidences.tolist(),
+                [f['price'] for f in features_list],
+                timestamps,
+                reasoning,
+                indicators
+            )
+        ]
         
         return signals
 
 
+def _get_predictor():
+    """Return the process-wide predictor, reloading it when the local model file changes"""
+    global _PREDICTOR, _PREDICTOR_MTIME
+    
+    try:
+        mtime = os.path.getmtime(MODEL_PATH)
+    except OSError:
+        mtime = None
+    
+    predictor = _PREDICTOR
+    if predictor is not None and mtime == _PREDICTOR_MTIME:
+        return predictor
+    
+    with _PREDICTOR_LOCK:
+        if _PREDICTOR is None or mtime != _PREDICTOR_MTIME:
+            predictor = TradingPredictor()
+            
+            # Load model
+            if not predictor.load_model(MODEL_PATH):
+                print("  Trying to download from Supabase...")
+                if not predictor.download_model_from_supabase():
+                    raise ValueError("Could not load model")
+            
+            _PREDICTOR = predictor
+            _PREDICTOR_MTIME = mtime
+    
+    return _PREDICTOR
+
+
 def predict_for_symbols(symbols):
     """Main prediction function"""
     print(f"\n🔮 Making predictions for: {', '.join(symbols)}")
     
     # Initialize components
     data_provider = MarketDataProvider()
-    predictor = TradingPredictor()
-    
-    # Load model
-    if not predictor.load_model('scalping_model_v2.pkl'):
-        print("  Trying to download from Supabase...")
-        if not predictor.download_model_from_supabase():
-            raise ValueError("Could not load model")
+    predictor = _get_predictor()
     
     # Get market data
     print("  Fetching market data...")
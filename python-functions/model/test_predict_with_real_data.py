@@ -0,0 +1,51 @@
+"""
+Tests for the latest-bar features computed by predict_with_real_data.py
+Usage: python -m pytest test_predict_with_real_data.py (or python test_predict_with_real_data.py)
+"""
+
+import numpy as np
+import pandas as pd
+
+from predict_with_real_data import FEATURE_DEFAULTS, MarketDataProvider
+
+
+def _bars(close, volume=1_000_000.0):
+    """Daily bars with the given closes (high/low equal to the close)"""
+    close = np.asarray(close, dtype=np.float64)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=len(close), freq='D', tz='UTC'),
+        'close': close,
+        'high': close,
+        'low': close,
+        'volume': np.full(len(close), volume),
+    })
+
+
+def _latest_features(bars):
+    # calculate_features only needs the bars, so skip the Alpaca client set up by __init__
+    provider = MarketDataProvider.__new__(MarketDataProvider)
+    features_list = provider.calculate_features({'FLAT': bars})
+    assert len(features_list) == 1
+    return features_list[0]
+
+
+def test_flat_window_bollinger_position_uses_default():
+    """A halted/illiquid symbol with a flat 20-bar window has zero band width, not rounding noise"""
+    for price in (101.37, 0.1 + 0.2, 1234.5678):
+        features = _latest_features(_bars(np.full(60, price)))
+        assert features['bb_position'] == FEATURE_DEFAULTS['bb_position'] == 0.5
+        assert features['bb_width'] == 0.0
+
+
+def test_flat_recent_window_after_moves():
+    """Only the last 20 bars matter: earlier moves don't leak noise into a flat recent window"""
+    close = np.concatenate([np.linspace(50.0, 80.0, 40), np.full(20, 73.19)])
+    features = _latest_features(_bars(close))
+    assert features['bb_position'] == 0.5
+    assert features['bb_width'] == 0.0
+
+
+if __name__ == '__main__':
+    test_flat_window_bollinger_position_uses_default()
+    test_flat_recent_window_after_moves()
+    print("✅ All tests passed")
@@ -1,6 +1,8 @@
+import io
 import os
 import json
 import math
+import hashlib
 from datetime import datetime, timedelta
 from http.server import BaseHTTPRequestHandler
 
@@ -21,15 +23,34 @@ REQUIRED_ENVS = [
     'SUPABASE_SERVICE_ROLE_KEY',
 ]
 
+# Serialized model bytes and sample accuracy, keyed by a hash of the training data
+_CACHE: dict = {}
+
+# Supabase client is created once per container and reused across invocations
+_SB_CLIENT = None
+
 
 def _json(status: int, body: dict):
     return status, {'Content-Type': 'application/json'}, json.dumps(body).encode()
 
 
+def _dataset_digest(X: pd.DataFrame, y: np.ndarray) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(','.join(X.columns).encode())
+    h.update(np.ascontiguousarray(X.to_numpy()).tobytes())
+    h.update(np.ascontiguousarray(y).tobytes())
+    return h.digest()
+
+
+def _supabase():
+    global _SB_CLIENT
+    if _SB_CLIENT is None:
+        _SB_CLIENT = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
+    return _SB_CLIENT
+
+
 def _upload_to_supabase(bytes_data: bytes, path: str):
-    url = os.getenv('SUPABASE_URL')
-    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-    client = create_client(url, key)
+    client = _supabase()
     bucket = 'models'
     # Ensure bucket exists
     try:
@@ -70,17 +91,24 @@ class handler(BaseHTTPRequestHandler):
         # Simple rule-of-thumb synthetic target
         y = np.where(X['rsi'] > 0.6, 1, np.where(X['rsi'] < 0.4, -1, 0))
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        rf = RandomForestClassifier(n_estimators=200, max_depth=10, random_state=42)
-        rf.fit(X_train, y_train)
-        acc = accuracy_score(y_test, rf.predict(X_test))
-
-        # Serialize model to bytes and upload to Supabase storage
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.pkl') as tmp:
-            dump(rf, tmp.name)
-            tmp.seek(0)
-            data = tmp.read()
+        # Trees split on float32 internally, so convert once instead of on every fit/predict
+        X = X.astype(np.float32)
+
+        # Warm containers reuse the artifact when the dataset is unchanged, skipping fit()
+        digest = _dataset_digest(X, y)
+        cached = _CACHE.get(digest)
+        if cached is None:
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            rf = RandomForestClassifier(n_estimators=200, max_depth=10, random_state=42, n_jobs=-1)
+            rf.fit(X_train, y_train)
+            acc = accuracy_score(y_test, rf.predict(X_test))
+
+            # Serialize model to bytes in memory and upload to Supabase storage
+            # zlib level 3 shrinks the forest ~4x and joblib.load detects it transparently
+            buf = io.BytesIO()
+            dump(rf, buf, compress=3)
+            cached = _CACHE[digest] = (buf.getvalue(), acc)
+        data, acc = cached
         model_path = 'scalping_model.pkl'
         _upload_to_supabase(data, model_path)
 
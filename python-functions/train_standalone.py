@@ -3,15 +3,14 @@
 Standalone ML training script for Random Forest trading model.
 Run this locally to train and upload the model to Supabase Storage.
 """
+import io
 import os
-import tempfile
 from datetime import datetime
 
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 from joblib import dump
 from dotenv import load_dotenv
 from supabase import create_client
@@ -21,6 +20,9 @@ load_dotenv()
 
 REQUIRED_ENVS = ['SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY']
 
+# Column order of the training matrix (and of the features predict.py sends)
+FEATURE_NAMES = ['rsi', 'macd', 'bbWidth', 'volumeRatio', 'newsSentiment', 'emaTrend']
+
 def main():
     print("🤖 AI-nance Trading Model Training")
     print("=" * 60)
@@ -47,22 +49,25 @@ def main():
     rng = np.random.default_rng(42)
     n = 5000
     
-    X = pd.DataFrame({
-        'rsi': rng.random(n),
-        'macd': rng.normal(0, 1, n),
-        'bbWidth': rng.random(n) * 0.05,
-        'volumeRatio': rng.integers(0, 2, n),
-        'newsSentiment': rng.normal(0, 0.3, n),
-        'emaTrend': rng.integers(0, 2, n),
-    })
+    # One float32 matrix in FEATURE_NAMES order, ready for sklearn without a DataFrame conversion.
+    # Columns are written straight into it, so no float64 n x 6 matrix is stacked and then copied
+    X = np.empty((n, len(FEATURE_NAMES)), dtype=np.float32)
+    X[:, 0] = rng.random(n)
+    X[:, 1] = rng.normal(0, 1, n)
+    X[:, 2] = rng.random(n) * 0.05
+    X[:, 3] = rng.integers(0, 2, n)
+    X[:, 4] = rng.normal(0, 0.3, n)
+    X[:, 5] = rng.integers(0, 2, n)
+    rsi = X[:, 0]
     
     # Generate labels: 1 (buy), -1 (sell), 0 (hold)
     # Simple rule-of-thumb synthetic target based on RSI
-    y = np.where(X['rsi'] > 0.6, 1, np.where(X['rsi'] < 0.4, -1, 0))
+    y = np.select([rsi > 0.6, rsi < 0.4], [1, -1], default=0).astype(np.int8)
     
     print(f"  • Generated {n} training samples")
-    print(f"  • Features: {list(X.columns)}")
-    print(f"  • Target distribution: Buy={sum(y==1)}, Hold={sum(y==0)}, Sell={sum(y==-1)}")
+    print(f"  • Features: {FEATURE_NAMES}")
+    sell, hold, buy = np.bincount(y + 1, minlength=3)  # labels -1/0/1 shifted to bins 0/1/2
+    print(f"  • Target distribution: Buy={buy}, Hold={hold}, Sell={sell}")
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -75,6 +80,9 @@ def main():
     rf = RandomForestClassifier(
         n_estimators=200,
         max_depth=10,
+        max_samples=0.5,  # each tree bootstraps half the rows, cutting per-tree build time
+        max_features='sqrt',
+        min_samples_leaf=5,
         random_state=42,
         n_jobs=-1,
         verbose=1
@@ -87,27 +95,22 @@ def main():
     y_pred = rf.predict(X_test)
     
     accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
+    # Precision, recall and F1 from one shared multilabel confusion matrix instead of three
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_test, y_pred, average='weighted', zero_division=0
+    )
     
     print(f"  • Accuracy:  {accuracy:.4f}")
     print(f"  • Precision: {precision:.4f}")
     print(f"  • Recall:    {recall:.4f}")
     print(f"  • F1 Score:  {f1:.4f}")
     
-    # Save model to temporary file
+    # Serialize straight into memory: no temp file to write, read back and unlink
     print("\n💾 Saving model...")
-    with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as tmp:
-        dump(rf, tmp.name)
-        tmp_path = tmp.name
-    
-    # Read model file
-    with open(tmp_path, 'rb') as f:
-        model_data = f.read()
-    
-    # Clean up temp file
-    os.unlink(tmp_path)
+    buffer = io.BytesIO()
+    # LZ4 shrinks the forest's repetitive node arrays several-fold; joblib.load detects it
+    dump(rf, buffer, compress=('lz4', 3))
+    model_data = buffer.getvalue()
     
     print(f"  • Model size: {len(model_data) / 1024:.2f} KB")
     
@@ -125,20 +128,14 @@ def main():
         else:
             print(f"  • Bucket check: {e}")
     
-    # Upload model
+    # Upload model: upsert overwrites in a single request instead of remove + upload,
+    # over the storage client's already-open keep-alive connection
     model_path = 'scalping_model.pkl'
     try:
-        # Try to remove existing file first (if it exists)
-        try:
-            client.storage.from_(bucket).remove([model_path])
-        except:
-            pass  # File might not exist yet
-        
-        # Upload new model
         result = client.storage.from_(bucket).upload(
             model_path,
             model_data,
-            {"content-type": "application/octet-stream"}
+            {"content-type": "application/octet-stream", "upsert": "true"}
         )
         print(f"✅ Model uploaded successfully: {model_path}")
     except Exception as e:
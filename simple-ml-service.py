@@ -1,11 +1,31 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import os
+import itertools
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so kernels still run as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,7 +33,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Trading ML Prediction Service",
     description="Real-time trading signal predictions using all indicators",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -25,6 +46,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (batches of signals are very repetitive JSON) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Pydantic models for request/response validation
 class MarketFeatures(BaseModel):
     """Features for a single symbol"""
@@ -49,6 +73,19 @@ class PredictionRequest(BaseModel):
     features: List[MarketFeatures]
     include_probabilities: bool = Field(False, description="Include probability distribution")
 
+class PredictionRequestArrays(BaseModel):
+    """Columnar batch request: one list per indicator, aligned with symbols"""
+    symbols: List[str]
+    rsi: List[float] = Field(..., description="Relative Strength Index (0-100) per symbol")
+    macd: List[float] = Field(..., description="MACD indicator per symbol")
+    macd_histogram: List[float] = Field(..., description="MACD histogram per symbol")
+    bb_position: List[float] = Field(..., description="Position within Bollinger Bands (0-1) per symbol")
+    ema_trend: List[int] = Field(..., description="EMA trend (0=bearish, 1=bullish) per symbol")
+    volume_ratio: List[float] = Field(..., description="Volume ratio vs average per symbol")
+    stochastic: List[float] = Field(..., description="Stochastic oscillator (0-100) per symbol")
+    price: Optional[List[Optional[float]]] = Field(None, description="Current price per symbol")
+    include_probabilities: bool = Field(False, description="Include probability distribution")
+
 class TradingSignal(BaseModel):
     """Trading signal response"""
     symbol: str
@@ -77,18 +114,209 @@ class HealthResponse(BaseModel):
 # Startup time for health checks
 STARTUP_TIME = datetime.utcnow()
 
+# Static body of the root endpoint, built once instead of per request
+SERVICE_INFO = {
+    "service": "Trading ML Prediction Service",
+    "version": "2.0.0",
+    "status": "running",
+    "endpoints": {
+        "predict": "/predict (POST)",
+        "predict_batch_array": "/predict_batch_array (POST, columnar)",
+        "health": "/health (GET)"
+    }
+}
+
+# Response timestamps are reused for up to this long, so busy periods skip the clock read and formatting
+TIMESTAMP_TTL = 0.05
+_TIMESTAMP_CACHE = (float('-inf'), "")  # (monotonic time, ISO string), swapped as one tuple for threads
+
+def _now_iso() -> str:
+    """UTC ISO timestamp, cached for TIMESTAMP_TTL seconds"""
+    global _TIMESTAMP_CACHE
+    checked, stamp = _TIMESTAMP_CACHE
+    now = time.monotonic()
+    if now - checked > TIMESTAMP_TTL:
+        stamp = datetime.utcnow().isoformat()
+        _TIMESTAMP_CACHE = (now, stamp)
+    return stamp
+
+# Indicator fields that drive the score, in the column order _score_batch expects
+SCORE_FIELDS = ('rsi', 'macd_histogram', 'bb_position', 'volume_ratio', 'stochastic', 'ema_trend')
+
+# LRU of recent (action, confidence, reasoning) results keyed on the exact SCORE_FIELDS values, so
+# symbols re-polled with unchanged indicators skip scoring (0 disables)
+SCORE_CACHE_SIZE = int(os.getenv('SCORE_CACHE_SIZE', '4096'))
+SCORE_CACHE = OrderedDict()
+SCORE_CACHE_LOCK = threading.Lock()  # /predict runs on threadpool workers
+
+
+# Action per kernel code, and the reasoning fragment per code of each indicator
+ACTION_LABELS = np.array(["hold", "buy", "sell"])
+REASON_LABELS = (
+    ("Neutral RSI", "Overbought (RSI>70)", "Oversold (RSI<30)"),
+    ("", "Bullish MACD", "Bearish MACD"),
+    ("", "Near upper BB", "Near lower BB"),
+    ("", "High volume", "Low volume"),
+    ("", "Overbought Stoch", "Oversold Stoch"),
+    ("Bullish EMA", "Bearish EMA"),
+)
+
+# Every possible reasoning string (3^5 * 2 = 486), indexed by the mixed-radix reason code written by
+# _score_kernel: product() varies the last indicator fastest, matching code = code * radix + digit
+REASONING_LABELS = [
+    "; ".join(part for part in parts if part) for parts in itertools.product(*REASON_LABELS)
+]
+
+
+@njit(cache=True, nogil=True)
+def _score_kernel(rows):
+    """
+    Score rows of SCORE_FIELDS using ALL indicators in one compiled pass
+    Returns action codes (0=hold, 1=buy, 2=sell), confidences and REASONING_LABELS indices
+    """
+    n = rows.shape[0]
+    actions = np.zeros(n, dtype=np.int8)
+    confidences = np.empty(n)
+    reasons = np.empty(n, dtype=np.int16)
+    for i in range(n):
+        score = 0.0
+        rsi_code = macd_code = bb_code = volume_code = stoch_code = ema_code = 0
+        
+        # RSI signals
+        if rows[i, 0] > 70:
+            score -= 2  # Overbought
+            rsi_code = 1
+        elif rows[i, 0] < 30:
+            score += 2  # Oversold
+            rsi_code = 2
+        
+        # MACD signals
+        if rows[i, 1] > 0:
+            score += 1  # Bullish momentum
+            macd_code = 1
+        elif rows[i, 1] < 0:
+            score -= 1  # Bearish momentum
+            macd_code = 2
+        
+        # Bollinger Bands
+        if rows[i, 2] > 0.8:
+            score -= 1  # Near upper band
+            bb_code = 1
+        elif rows[i, 2] < 0.2:
+            score += 1  # Near lower band
+            bb_code = 2
+        
+        # Volume confirmation
+        if rows[i, 3] > 1.5:
+            score += 0.5  # High volume confirms
+            volume_code = 1
+        elif rows[i, 3] < 0.5:
+            score -= 0.5  # Low volume weakens signal
+            volume_code = 2
+        
+        # Stochastic
+        if rows[i, 4] > 80:
+            score -= 1  # Overbought
+            stoch_code = 1
+        elif rows[i, 4] < 20:
+            score += 1  # Oversold
+            stoch_code = 2
+        
+        # EMA trend
+        if rows[i, 5] == 1:
+            score += 0.5  # Bullish trend
+        else:
+            score -= 0.5  # Bearish trend
+            ema_code = 1
+        
+        reasons[i] = (
+            ((((rsi_code * 3 + macd_code) * 3 + bb_code) * 3 + volume_code) * 3 + stoch_code) * 2 + ema_code
+        )
+        
+        # Convert score to action and confidence
+        if score >= 2:
+            actions[i] = 1
+            confidences[i] = min(0.9, 0.6 + (score - 2) * 0.1)
+        elif score <= -2:
+            actions[i] = 2
+            confidences[i] = min(0.9, 0.6 + abs(score + 2) * 0.1)
+        else:
+            confidences[i] = 0.6
+    return actions, confidences, reasons
+
+
+def _score_batch(rows: np.ndarray):
+    """Score rows of SCORE_FIELDS, returning action labels, confidences and reasoning strings"""
+    actions, confidences, reasons = _score_kernel(rows)
+    reasoning = [REASONING_LABELS[code] for code in reasons.tolist()]
+    return ACTION_LABELS[actions].tolist(), confidences.tolist(), reasoning
+
+
+def _score_cached(rows: np.ndarray):
+    """(action, confidence, reasoning) per row of SCORE_FIELDS, only scoring rows missing from SCORE_CACHE"""
+    if SCORE_CACHE_SIZE <= 0:
+        return list(zip(*_score_batch(rows)))
+    
+    keys = [row.tobytes() for row in rows]
+    with SCORE_CACHE_LOCK:
+        hits = [SCORE_CACHE.get(key) for key in keys]
+    misses = [i for i, hit in enumerate(hits) if hit is None]
+    
+    # Score outside the lock so concurrent requests overlap (the kernel releases the GIL)
+    if misses:
+        for i, scored in zip(misses, zip(*_score_batch(rows[misses]))):
+            hits[i] = scored
+    
+    # (Re)insert every row as most recent; concurrent requests may have evicted hits meanwhile
+    with SCORE_CACHE_LOCK:
+        for key, hit in zip(keys, hits):
+            SCORE_CACHE[key] = hit
+            SCORE_CACHE.move_to_end(key)
+        while len(SCORE_CACHE) > SCORE_CACHE_SIZE:
+            SCORE_CACHE.popitem(last=False)
+    
+    return hits
+
+def _make_signal(symbol, price, rsi, macd, bb_position, volume_ratio, stochastic, scored, timestamp):
+    """TradingSignal for one symbol from its scored (action, confidence, reasoning)"""
+    action, confidence, reasoning = scored
+    # Build signal with ALL indicators; model_construct skips re-validating values computed here
+    return TradingSignal.model_construct(
+        symbol=symbol,
+        action=action,
+        confidence=confidence,
+        price=price,
+        reasoning=reasoning,
+        # Fields are already floats after validation, so only the display rounding remains
+        indicators={
+            'rsi': round(rsi, 2),
+            'macd': round(macd, 4),
+            'bb_position': round(bb_position, 2),
+            'volume_ratio': round(volume_ratio, 2),
+            'stochastic': round(stochastic, 2)
+        },
+        timestamp=timestamp
+    )
+
+# Inclusive bounds MarketFeatures enforces per field, checked column-wise for PredictionRequestArrays
+ARRAY_BOUNDS = {
+    'rsi': (0, 100),
+    'bb_position': (0, 1),
+    'ema_trend': (0, 1),
+    'volume_ratio': (0, np.inf),
+    'stochastic': (0, 100),
+}
+
+@app.on_event("startup")
+async def startup_event():
+    """Compile (or load the cached) scoring kernel before the first request arrives"""
+    _score_kernel(np.zeros((1, len(SCORE_FIELDS))))
+    logger.info(f"✅ Scoring kernel ready ({'numba' if NUMBA_AVAILABLE else 'pure Python'})")
+
 @app.get("/", response_model=Dict)
 async def root():
     """Root endpoint"""
-    return {
-        "service": "Trading ML Prediction Service",
-        "version": "2.0.0",
-        "status": "running",
-        "endpoints": {
-            "predict": "/predict (POST)",
-            "health": "/health (GET)"
-        }
-    }
+    return SERVICE_INFO
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -103,104 +331,74 @@ async def health_check():
     )
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+def predict(request: PredictionRequest):
     """
     Make trading signal predictions using all indicators
     
     This version uses all the indicators you send to make intelligent predictions
+    (a plain def: FastAPI runs the CPU-bound scoring in its threadpool, off the event loop)
     """
     try:
-        signals = []
-        timestamp = datetime.utcnow().isoformat()
+        timestamp = _now_iso()
+        features = request.features
+        signals = [None] * len(features)  # sized up front, filled by index
+        rows = np.array(
+            [[getattr(f, name) for name in SCORE_FIELDS] for f in features], dtype=np.float64
+        ).reshape(len(features), len(SCORE_FIELDS))
         
-        for feature in request.features:
-            # Calculate a score based on ALL indicators
-            score = 0
-            reasoning_parts = []
-            
-            # RSI signals
-            if feature.rsi > 70:
-                score -= 2  # Overbought
-                reasoning_parts.append("Overbought (RSI>70)")
-            elif feature.rsi < 30:
-                score += 2  # Oversold
-                reasoning_parts.append("Oversold (RSI<30)")
-            else:
-                reasoning_parts.append("Neutral RSI")
-            
-            # MACD signals
-            if feature.macd_histogram > 0:
-                score += 1  # Bullish momentum
-                reasoning_parts.append("Bullish MACD")
-            elif feature.macd_histogram < 0:
-                score -= 1  # Bearish momentum
-                reasoning_parts.append("Bearish MACD")
-            
-            # Bollinger Bands
-            if feature.bb_position > 0.8:
-                score -= 1  # Near upper band
-                reasoning_parts.append("Near upper BB")
-            elif feature.bb_position < 0.2:
-                score += 1  # Near lower band
-                reasoning_parts.append("Near lower BB")
-            
-            # Volume confirmation
-            if feature.volume_ratio > 1.5:
-                score += 0.5  # High volume confirms
-                reasoning_parts.append("High volume")
-            elif feature.volume_ratio < 0.5:
-                score -= 0.5  # Low volume weakens signal
-                reasoning_parts.append("Low volume")
-            
-            # Stochastic
-            if feature.stochastic > 80:
-                score -= 1  # Overbought
-                reasoning_parts.append("Overbought Stoch")
-            elif feature.stochastic < 20:
-                score += 1  # Oversold
-                reasoning_parts.append("Oversold Stoch")
-            
-            # EMA trend
-            if feature.ema_trend == 1:
-                score += 0.5  # Bullish trend
-                reasoning_parts.append("Bullish EMA")
-            else:
-                score -= 0.5  # Bearish trend
-                reasoning_parts.append("Bearish EMA")
-            
-            # Convert score to action and confidence
-            if score >= 2:
-                action = "buy"
-                confidence = min(0.9, 0.6 + (score - 2) * 0.1)
-            elif score <= -2:
-                action = "sell"
-                confidence = min(0.9, 0.6 + abs(score + 2) * 0.1)
-            else:
-                action = "hold"
-                confidence = 0.6
-            
-            reasoning = "; ".join(reasoning_parts)
-            
-            # Build signal with ALL indicators
-            signal = TradingSignal(
-                symbol=feature.symbol,
-                action=action,
-                confidence=confidence,
-                price=feature.price,
-                reasoning=reasoning,
-                indicators={
-                    'rsi': round(float(feature.rsi), 2),
-                    'macd': round(float(feature.macd), 4),
-                    'bb_position': round(float(feature.bb_position), 2),
-                    'volume_ratio': round(float(feature.volume_ratio), 2),
-                    'stochastic': round(float(feature.stochastic), 2)
-                },
-                timestamp=timestamp
+        for i, (feature, scored) in enumerate(zip(features, _score_cached(rows))):
+            signals[i] = _make_signal(
+                feature.symbol, feature.price, feature.rsi, feature.macd, feature.bb_position,
+                feature.volume_ratio, feature.stochastic, scored, timestamp
             )
-            
-            signals.append(signal)
         
-        return PredictionResponse(
+        return PredictionResponse.model_construct(
+            success=True,
+            signals=signals,
+            model_version="smart-indicator-2.0",
+            timestamp=timestamp
+        )
+        
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+@app.post("/predict_batch_array", response_model=PredictionResponse)
+def predict_batch_array(request: PredictionRequestArrays):
+    """
+    Same signals as /predict for a columnar request: each indicator list is validated once and
+    stacked straight into the scoring matrix instead of going through one object per symbol
+    """
+    n = len(request.symbols)
+    columns = {name: np.asarray(getattr(request, name), dtype=np.float64) for name in SCORE_FIELDS}
+    columns['macd'] = np.asarray(request.macd, dtype=np.float64)
+    prices = request.price if request.price is not None else [None] * n
+    
+    mismatched = [name for name, column in columns.items() if column.shape[0] != n]
+    if len(prices) != n:
+        mismatched.append('price')
+    if mismatched:
+        raise HTTPException(
+            status_code=422, detail=f"Lengths of {', '.join(mismatched)} do not match symbols ({n})"
+        )
+    
+    # NaN fails both comparisons, so it is rejected like the per-object Field bounds would
+    out_of_range = [
+        name for name, (low, high) in ARRAY_BOUNDS.items()
+        if not ((columns[name] >= low) & (columns[name] <= high)).all()
+    ]
+    if out_of_range:
+        raise HTTPException(status_code=422, detail=f"Values out of range in {', '.join(out_of_range)}")
+    
+    try:
+        timestamp = _now_iso()
+        rows = np.column_stack([columns[name] for name in SCORE_FIELDS]).reshape(n, len(SCORE_FIELDS))
+        signals = list(map(
+            _make_signal, request.symbols, prices, request.rsi, request.macd, request.bb_position,
+            request.volume_ratio, request.stochastic, _score_cached(rows), itertools.repeat(timestamp)
+        ))
+        
+        return PredictionResponse.model_construct(
             success=True,
             signals=signals,
             model_version="smart-indicator-2.0",
@@ -214,4 +412,11 @@ async def predict(request: PredictionRequest):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))  # scale out explicitly; cpu_count() ignores cgroup limits
+    # Workers need an import string; the file is deployed under different names (main.py in Docker).
+    # uvicorn's default loop/http pick uvloop and httptools when installed; per-request access logs are off
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    uvicorn.run(
+        f"{module}:app", host="0.0.0.0", port=port, workers=workers,
+        log_level=os.getenv("LOG_LEVEL", "warning"), access_log=False
+    )
\ No newline at end of file